@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # o brotli é opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def parse_accept_encoding(header):
+    """Converte o cabeçalho Accept-Encoding em um dicionário {codificação: qvalue}."""
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Comprime as respostas em brotli ou gzip conforme o Accept-Encoding do cliente.
+    Respostas menores que COMPRESSION['MIN_SIZE'] bytes, que não são texto/JSON
+    ou que não ficariam menores após a compressão são enviadas sem alteração.
+    Respostas em streaming são comprimidas bloco a bloco.
+    """
+
+    # Mesma proteção contra BREACH utilizada pelo GZipMiddleware do Django
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        options = getattr(settings, 'COMPRESSION', {})
+        self.min_size = options.get('MIN_SIZE', 1024)
+        self.brotli_quality = options.get('BROTLI_QUALITY', 4)
+
+    def select_encoding(self, request):
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        candidates = (['br'] if brotli is not None else []) + ['gzip']
+        best, best_quality = None, 0.0
+        for encoding in candidates:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, encoding, content):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, encoding, sequence):
+        if encoding == 'br':
+            return brotli_sequence(sequence, self.brotli_quality)
+        return compress_sequence(sequence, max_random_bytes=self.max_random_bytes)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        if response.streaming:
+            # O tamanho de uma resposta em streaming só é conhecido se o Content-Length foi informado
+            length = response.get('Content-Length')
+            if (length and int(length) < self.min_size) or response.is_async:
+                return response
+        elif len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(encoding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
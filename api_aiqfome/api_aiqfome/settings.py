@@ -13,10 +13,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Arquivos gerados pela aplicação (cache de miniaturas, outbox em arquivo), fora do código fonte
+DATA_DIR = Path(os.getenv('DATA_DIR', Path(tempfile.gettempdir()) / 'api_aiqfome'))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -45,9 +49,13 @@ INSTALLED_APPS = [
     'drf_yasg',
     'customers',
     'custom_auth',
+    'monitoring',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
+    'api_aiqfome.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_aiqfome.urls'
@@ -173,4 +182,98 @@ SWAGGER_SETTINGS = {
     },
     # opcional: desabilita auth via sessão no Swagger UI (útil em APIs JWT-only)
     'USE_SESSION_AUTH': False,
-}
\ No newline at end of file
+}
+
+# Compressão das respostas (brotli, se instalado, ou gzip)
+COMPRESSION = {
+    # respostas menores que este tamanho (em bytes) não são comprimidas
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+    'BROTLI_QUALITY': int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4)),
+}
+
+# Importação em lote de clientes
+CUSTOMER_IMPORT = {
+    'CHUNK_SIZE': int(os.getenv('CUSTOMER_IMPORT_CHUNK_SIZE', 1000)),
+    'BATCH_SIZE': int(os.getenv('CUSTOMER_IMPORT_BATCH_SIZE', 500)),
+    # processos utilizados para gerar os hashes das senhas
+    'WORKERS': int(os.getenv('CUSTOMER_IMPORT_WORKERS', os.cpu_count() or 1)),
+    # arquivos enviados pelo endpoint aguardando a importação pela fila de jobs
+    'UPLOAD_DIR': os.getenv('CUSTOMER_IMPORT_UPLOAD_DIR', str(DATA_DIR / 'imports')),
+}
+
+
+# Métricas (Prometheus em /metrics e cabeçalho Server-Timing)
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+# o endpoint /metrics exige o cabeçalho 'Authorization: Bearer <token>', sem o token só é acessível com DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Perfil de requisições (cabeçalho 'X-Profile' ou '?profile=1', apenas para usuários staff)
+REQUEST_PROFILING = {
+    # requisições mais lentas que o limite (em segundos) são registradas no admin
+    'SLOW_REQUEST_THRESHOLD': float(os.getenv('SLOW_REQUEST_THRESHOLD', 1.0)),
+    # quantidade de registros mantidos para cada tipo (perfil solicitado / requisição lenta)
+    'RING_SIZE': int(os.getenv('REQUEST_PROFILING_RING_SIZE', 200)),
+    'STATS_LIMIT': 50,
+}
+
+# Outbox dos eventos de alteração dos favoritos (entregues pelo comando 'dispatch_outbox')
+OUTBOX_WEBHOOK_URL = os.getenv('OUTBOX_WEBHOOK_URL')
+OUTBOX = {
+    'SINK': {
+        'BACKEND': 'customers.outbox.WebhookSink',
+        'OPTIONS': {'url': OUTBOX_WEBHOOK_URL, 'timeout': 5},
+    } if OUTBOX_WEBHOOK_URL else {
+        'BACKEND': 'customers.outbox.FileSink',
+        'OPTIONS': {'path': os.getenv('OUTBOX_FILE', str(DATA_DIR / 'outbox.jsonl'))},
+    },
+    'BATCH_SIZE': int(os.getenv('OUTBOX_BATCH_SIZE', 100)),
+    # tentativas de entrega antes de o evento ser marcado como falho
+    'MAX_ATTEMPTS': int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10)),
+    # espera em segundos antes da primeira nova tentativa, dobrando a cada falha até MAX_RETRY_DELAY
+    'RETRY_DELAY': 1.0,
+    'MAX_RETRY_DELAY': 300.0,
+    'POLL_INTERVAL': float(os.getenv('OUTBOX_POLL_INTERVAL', 1.0)),
+}
+
+# Sincronização incremental dos favoritos (/customers/favorite-products/sync/)
+FAVORITES_SYNC = {
+    # segundos anteriores ao token lidos novamente, cobrem commits demorados e diferenças de relógio
+    'OVERLAP': int(os.getenv('FAVORITES_SYNC_OVERLAP', 60)),
+    # tombstones mais antigos são removidos, tokens anteriores recebem a lista completa
+    'TOMBSTONE_RETENTION_DAYS': int(os.getenv('FAVORITES_TOMBSTONE_RETENTION_DAYS', 30)),
+}
+
+# Fila de jobs de background no PostgreSQL (executados pelo comando 'run_jobs')
+JOBS = {
+    'POLL_INTERVAL': float(os.getenv('JOBS_POLL_INTERVAL', 1.0)),
+    # intervalo em segundos entre os sinais enviados pelo worker durante a execução de um job
+    'HEARTBEAT_INTERVAL': int(os.getenv('JOBS_HEARTBEAT_INTERVAL', 30)),
+    # jobs sem sinal do worker há mais tempo (em segundos) voltam para a fila
+    'STALE_AFTER': int(os.getenv('JOBS_STALE_AFTER', 300)),
+    'KEEP_FINISHED_DAYS': 7,
+    # tarefas periódicas: intervalo em segundos entre as execuções
+    'SCHEDULE': {
+        'refresh-catalog': {'task': 'customers.refresh_catalog', 'interval': 60*60},
+        'archive-inactive-favorites': {'task': 'customers.archive_inactive_favorites', 'interval': 24*60*60},
+        'cleanup-jobs': {'task': 'jobs.cleanup', 'interval': 60*60},
+        'prune-favorite-tombstones': {'task': 'customers.prune_tombstones', 'interval': 24*60*60},
+    },
+}
+
+# Miniaturas das imagens de produtos (/customers/products/{id}/thumbnail/)
+THUMBNAILS = {
+    'CACHE_DIR': os.getenv('THUMBNAIL_CACHE_DIR', str(DATA_DIR / 'thumbnails')),
+    # tamanho máximo do cache em disco, os arquivos acessados há mais tempo são removidos
+    'MAX_CACHE_SIZE': int(os.getenv('THUMBNAIL_MAX_CACHE_SIZE', 256 * 1024 * 1024)),
+    # a limpeza percorre o diretório no máximo uma vez a cada intervalo (em segundos) por processo
+    # e remove os arquivos até o cache ocupar a fração EVICT_TARGET do tamanho máximo
+    'EVICT_INTERVAL': int(os.getenv('THUMBNAIL_EVICT_INTERVAL', 60)),
+    'EVICT_TARGET': 0.9,
+    # lado máximo em pixels de cada tamanho disponível
+    'SIZES': {'small': 128, 'medium': 320},
+    'DEFAULT_SIZE': 'small',
+    # imagens originais maiores que o limite (em bytes) não são processadas
+    'MAX_SOURCE_SIZE': 10 * 1024 * 1024,
+    'TIMEOUT': 5,
+    'QUALITY': 85,
+}
@@ -0,0 +1,111 @@
+import gzip
+from unittest import mock
+
+import brotli
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api_aiqfome import middleware
+from api_aiqfome.middleware import CompressionMiddleware, parse_accept_encoding
+
+
+@override_settings(COMPRESSION={'MIN_SIZE': 100, 'BROTLI_QUALITY': 4})
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_parse_accept_encoding(self):
+        """Leitura do cabeçalho Accept-Encoding com qvalues"""
+        self.assertEqual(
+            {'gzip': 1.0, 'br': 0.5, '*': 0.0},
+            parse_accept_encoding('gzip, br;q=0.5, *;q=0')
+        )
+
+    def test_prefers_brotli(self):
+        """Brotli é utilizado quando aceito pelo cliente"""
+        content = b'{"title": "produto"}' * 50
+        response = self.process(HttpResponse(content, content_type='application/json'))
+
+        self.assertEqual('br', response['Content-Encoding'])
+        self.assertEqual(content, brotli.decompress(response.content))
+        self.assertEqual(str(len(response.content)), response['Content-Length'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip(self):
+        """Gzip é utilizado quando o cliente não aceita brotli"""
+        content = b'{"title": "produto"}' * 50
+        response = self.process(HttpResponse(content, content_type='application/json'), 'gzip, br;q=0')
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertEqual(content, gzip.decompress(response.content))
+
+    def test_gzip_without_brotli_installed(self):
+        """Sem o pacote brotli a resposta é comprimida com gzip"""
+        content = b'{"title": "produto"}' * 50
+        with mock.patch.object(middleware, 'brotli', None):
+            response = self.process(HttpResponse(content, content_type='application/json'))
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+
+    def test_small_response_not_compressed(self):
+        """Respostas menores que o limite não são comprimidas"""
+        response = self.process(HttpResponse(b'{"ok": true}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_accepted(self):
+        """Sem Accept-Encoding compatível a resposta não é comprimida"""
+        content = b'{"title": "produto"}' * 50
+        response = self.process(HttpResponse(content, content_type='application/json'), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(content, response.content)
+
+    def test_binary_content_not_compressed(self):
+        """Conteúdos já comprimidos, como imagens, não são comprimidos novamente"""
+        response = self.process(HttpResponse(b'\x89PNG' * 100, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        """Respostas em streaming são comprimidas bloco a bloco"""
+        chunks = [b'id,username\n'] + [f'{index},user{index}\n'.encode() for index in range(200)]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='text/csv'), 'gzip')
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(b''.join(chunks), gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_streaming_response_brotli(self):
+        """Respostas em streaming também podem ser comprimidas com brotli"""
+        chunks = [f'{index},user{index}\n'.encode() for index in range(200)]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='text/csv'), 'br')
+
+        self.assertEqual('br', response['Content-Encoding'])
+        self.assertEqual(b''.join(chunks), brotli.decompress(b''.join(response.streaming_content)))
+
+
+class CompressionIntegrationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', is_staff=True)
+        User.objects.bulk_create(
+            User(username=f'user{index}', email=f'user{index}@example.com') for index in range(50)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_list_customers_compressed(self):
+        """A listagem de clientes é comprimida quando o cliente aceita gzip"""
+        response = self.client.get('/customers/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn(b'user49', gzip.decompress(response.content))
@@ -0,0 +1,161 @@
+"""
+Benchmark da API com uma API de produtos local, sem acesso à rede externa.
+
+Uso (a partir do diretório do manage.py):
+    python -m benchmarks --users 10000 --favorites 20 --concurrency 16 --requests 2000
+
+Sem --base-url o benchmark cria um banco de testes, sobe a aplicação em um servidor WSGI
+local e remove o banco ao final. Com --base-url as requisições são enviadas ao servidor
+informado e os dados são criados no banco configurado, o que exige --allow-db-writes.
+Os dados criados são removidos ao final (exceto com --keep-data). O servidor deve utilizar
+a API de produtos local: inicie-o com URL_EXTERNAL_API apontando para o endereço fixo
+definido em --catalog-host/--catalog-port, ex:
+    URL_EXTERNAL_API=http://127.0.0.1:8900/products python manage.py runserver
+    python -m benchmarks --base-url http://127.0.0.1:8000 --catalog-port 8900 --allow-db-writes
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+
+import django
+
+from .loadtest import format_results, run
+from .stub_catalog import StubCatalog
+
+SCENARIOS = ('login', 'customers', 'favorites')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--favorites', type=int, default=10, help="Produtos favoritos por cliente")
+    parser.add_argument('--products', type=int, default=100, help="Produtos na API de produtos local")
+    parser.add_argument('--catalog-latency', type=float, default=0.05, help="Latência da API de produtos em segundos")
+    parser.add_argument('--catalog-error-rate', type=float, default=0.0, help="Fração de respostas 500 da API")
+    parser.add_argument('--catalog-host', default='127.0.0.1', help="Endereço da API de produtos local")
+    parser.add_argument('--catalog-port', type=int, default=0, help="Porta da API de produtos local (padrão: aleatória)")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=500, help="Requisições por cenário")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Cenários separados por vírgula")
+    parser.add_argument('--page-size', type=int, default=50, help="page_size do cenário de clientes")
+    parser.add_argument('--base-url', help="Servidor já em execução, ex: http://127.0.0.1:8000")
+    parser.add_argument('--allow-db-writes', action='store_true', help="Permite criar os dados no banco configurado (--base-url)")
+    parser.add_argument('--keep-data', action='store_true', help="Não remove os dados criados no banco configurado (--base-url)")
+    parser.add_argument('--keepdb', action='store_true', help="Mantém o banco de testes entre execuções")
+    parser.add_argument('--debug', action='store_true', help="Mantém DEBUG=True no servidor local")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Arquivo para salvar os resultados em JSON")
+    return parser.parse_args(argv)
+
+
+def start_server(debug):
+    from django.conf import settings
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    if not debug:
+        # Com DEBUG=True todas as consultas SQL ficam registradas em memória
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}'
+
+
+def build_scenarios(base_url, user_ids, args):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from .seed import ADMIN_USERNAME, PASSWORD
+
+    rng = random.Random(args.seed)
+    admin_token = str(RefreshToken.for_user(User.objects.get(username=ADMIN_USERNAME)).access_token)
+    sample = rng.sample(user_ids, min(len(user_ids), 200))
+    users = {user.id: user for user in User.objects.filter(id__in=sample)}
+    tokens = [str(RefreshToken.for_user(users[user_id]).access_token) for user_id in sample]
+    usernames = [users[user_id].username for user_id in sample]
+
+    def login(session, index):
+        payload = {'username': usernames[index % len(usernames)], 'password': PASSWORD}
+        return session.post(f'{base_url}/auth/login', data=payload)
+
+    def customers(session, index):
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        return session.get(f'{base_url}/customers/', params={'page_size': args.page_size}, headers=headers)
+
+    def favorites(session, index):
+        headers = {'Authorization': f'Bearer {tokens[index % len(tokens)]}'}
+        return session.get(f'{base_url}/customers/favorite-products/', headers=headers)
+
+    return {'login': login, 'customers': customers, 'favorites': favorites}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Cenários inválidos: {', '.join(sorted(unknown))}")
+    if args.base_url and not args.allow_db_writes:
+        sys.exit(
+            "Com --base-url os clientes do benchmark são criados no banco configurado em DATABASES. "
+            "Confirme com --allow-db-writes."
+        )
+
+    catalog = StubCatalog(
+        products=args.products, latency=args.catalog_latency, error_rate=args.catalog_error_rate,
+        host=args.catalog_host, port=args.catalog_port, seed=args.seed,
+    ).start()
+    os.environ['URL_EXTERNAL_API'] = catalog.url
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_aiqfome.settings')
+    django.setup()
+
+    from django.test.utils import setup_databases, teardown_databases
+
+    from .seed import seed, unseed
+
+    print(f"API de produtos local: {catalog.url}")
+    old_config = None if args.base_url else setup_databases(verbosity=0, interactive=False, keepdb=args.keepdb)
+    server = None
+    try:
+        user_ids = seed(args.users, args.favorites, args.products, seed=args.seed)
+        print(f"{len(user_ids)} clientes com {args.favorites} favoritos cada.")
+
+        base_url = args.base_url
+        if not base_url:
+            server, base_url = start_server(args.debug)
+
+        requests_by_scenario = build_scenarios(base_url.rstrip('/'), user_ids, args)
+        results = []
+        for name in scenarios:
+            catalog.reset_requests()
+            result = run(name, requests_by_scenario[name], args.concurrency, args.requests)
+            result['catalog_requests'] = catalog.requests
+            results.append(result)
+
+        print(format_results(results))
+        if args.json:
+            with open(args.json, 'w') as file:
+                json.dump(results, file, indent=2)
+    finally:
+        if server:
+            server.shutdown()
+        if old_config is not None and not args.keepdb:
+            teardown_databases(old_config, verbosity=0)
+        if args.base_url and not args.keep_data:
+            print(f"{unseed()} clientes do benchmark removidos.")
+        catalog.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import requests
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(name, make_request, concurrency=10, total=1000):
+    """
+    Executa 'total' requisições com 'concurrency' threads em paralelo.
+    'make_request(session, index)' deve retornar a resposta HTTP.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            try:
+                failed = make_request(session, index).status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    return {
+        'scenario': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'duration': duration,
+        'throughput': len(latencies) / duration if duration else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def format_results(results):
+    lines = [f"{'cenário':<12}{'req':>8}{'erros':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for result in results:
+        lines.append(
+            f"{result['scenario']:<12}{result['requests']:>8}{result['errors']:>8}{result['throughput']:>10.1f}"
+            f"{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,57 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from customers.models import FavoriteProduct
+
+PASSWORD = 'bench-123456'
+ADMIN_USERNAME = 'bench_admin'
+
+
+def seed(users=1000, favorites_per_user=10, products=20, batch_size=5000, seed=None):
+    """
+    Cria clientes e produtos favoritos para o benchmark com bulk_create.
+    O hash da senha é gerado uma única vez e compartilhado por todos os clientes.
+    Retorna os ids dos clientes criados.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create([
+        User(username=ADMIN_USERNAME, email='bench_admin@example.com', password=password, is_staff=True)
+    ], ignore_conflicts=True)
+
+    existing = User.objects.filter(username__startswith='bench_user_').count()
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'bench_user_{index}', email=f'bench_user_{index}@example.com', password=password,
+                first_name=f'Nome {index}', last_name=f'Sobrenome {index}',
+            )
+            for index in range(existing, users)
+        ),
+        batch_size=batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith='bench_user_').order_by('id').values_list('id', flat=True)[:users]
+    )
+
+    favorites_per_user = min(favorites_per_user, products)
+    favorites = (
+        FavoriteProduct(user_id=user_id, product_id=product_id)
+        for user_id in user_ids
+        for product_id in rng.sample(range(1, products + 1), favorites_per_user)
+    )
+    FavoriteProduct.objects.bulk_create(favorites, batch_size=batch_size, ignore_conflicts=True)
+    return user_ids
+
+
+def unseed():
+    """Remove os clientes criados pelo benchmark e os seus favoritos. Retorna a quantidade de clientes removidos."""
+    users = User.objects.filter(Q(username__startswith='bench_user_') | Q(username=ADMIN_USERNAME))
+    FavoriteProduct.objects.filter(user__in=users).delete()
+    count = users.count()
+    users.delete()
+    return count
@@ -0,0 +1,133 @@
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_product(product_id, image_base='https://example.com/images'):
+    """Produto no mesmo formato da API externa (fakestoreapi.com/products)."""
+    return {
+        'id': product_id,
+        'title': f'Produto {product_id}',
+        'price': round(10 + product_id * 1.37, 2),
+        'description': f'Descrição do produto {product_id}',
+        'category': 'stub',
+        'image': f'{image_base}/{product_id}.png',
+        'rating': {'rate': round(1 + product_id % 40 / 10, 1), 'count': product_id * 7 % 500},
+    }
+
+
+def make_image(product_id, width=640, height=480):
+    """Imagem PNG com um gradiente de cor própria de cada produto, gerada sem dependências externas."""
+    red, green, blue = (product_id * 47) % 256, (product_id * 89) % 256, (product_id * 137) % 256
+    rows = b''.join(
+        b'\x00' + bytes((red, (green + y) % 256, blue)) * width
+        for y in range(height)
+    )
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+
+class StubCatalog:
+    """
+    API de produtos local para testes e benchmarks, sem acesso à rede externa.
+    Atende '/products', '/products/{id}' e as imagens '/images/{id}.png' com latência
+    e taxa de erro configuráveis.
+    """
+
+    def __init__(self, products=20, latency=0.0, error_rate=0.0, host='127.0.0.1', port=0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.images = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+        self.products = {
+            product_id: make_product(product_id, image_base=f'{self.base_url}/images')
+            for product_id in range(1, products + 1)
+        }
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def url(self):
+        return f'{self.base_url}/products'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_requests(self):
+        with self.lock:
+            self.requests = 0
+
+    def _respond(self, path):
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate and self.random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            return 500, {'detail': 'stub error'}
+
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if parts == ['products']:
+            return 200, list(self.products.values())
+        if len(parts) == 2 and parts[0] == 'products' and parts[1].isdigit() and int(parts[1]) in self.products:
+            return 200, self.products[int(parts[1])]
+        if len(parts) == 2 and parts[0] == 'images':
+            product_id = parts[1].removesuffix('.png')
+            if product_id.isdigit() and int(product_id) in self.products:
+                return 200, self.image(int(product_id))
+        return 404, {'detail': 'Not found'}
+
+    def image(self, product_id):
+        with self.lock:
+            if product_id not in self.images:
+                self.images[product_id] = make_image(product_id)
+            return self.images[product_id]
+
+    def _handler(self):
+        catalog = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, payload = catalog._respond(self.path)
+                if isinstance(payload, bytes):
+                    body, content_type = payload, 'image/png'
+                else:
+                    body, content_type = json.dumps(payload).encode(), 'application/json'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
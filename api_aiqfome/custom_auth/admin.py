@@ -1,3 +1,32 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
 
-# Register your models here.
+from customers.archive import deactivate_customer
+from customers.pagination import EstimatedCountPaginator
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class CustomerAdmin(UserAdmin):
+    """
+    Admin de usuários sem COUNT(*) na listagem. O filtro por grupos foi removido
+    pois exige um JOIN com a tabela de grupos, e a busca padrão (username, nome e e-mail)
+    utiliza os índices trigram criados pela migração customers.0003.
+    """
+    list_filter = ['is_staff', 'is_superuser', 'is_active']
+    sortable_by = ['username']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        # A desativação pelo checkbox 'is_active' passa por deactivate_customer, que registra
+        # a data utilizada pelo arquivamento dos favoritos
+        deactivated = change and 'is_active' in form.changed_data and not obj.is_active
+        if deactivated:
+            obj.is_active = True
+        super().save_model(request, obj, form, change)
+        if deactivated:
+            deactivate_customer(obj)
@@ -0,0 +1,89 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from customers import catalog
+
+# Backends de cache em memória não são compartilhados com o processo do servidor
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepara o container em um único processo: espera o banco de dados, aplica as "
+        "migrações pendentes e cria o superusuário caso não exista"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Banco de dados utilizado")
+        parser.add_argument('--timeout', type=float, default=60.0, help="Tempo máximo de espera pelo banco em segundos")
+        parser.add_argument('--skip-superuser', action='store_true', help="Não cria o superusuário")
+        parser.add_argument('--warm-cache', action='store_true', help="Carrega os produtos da API externa no cache")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        self.wait_for_database(connection, options['timeout'])
+        self.migrate(connection, options['verbosity'])
+        if not options['skip_superuser']:
+            self.ensure_superuser(options['database'])
+        if options['warm_cache']:
+            self.warm_cache()
+
+    def wait_for_database(self, connection, timeout):
+        """Tenta conectar ao banco com espera exponencial (0,1s até 2s entre as tentativas)."""
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            try:
+                connection.ensure_connection()
+                break
+            except OperationalError as error:
+                connection.close()
+                if time.monotonic() + delay > deadline:
+                    raise CommandError(f"Banco de dados indisponível após {timeout:g}s: {error}")
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+        self.stdout.write("Banco de dados pronto!")
+
+    def migrate(self, connection, verbosity):
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            self.stdout.write("Nenhuma migração pendente.")
+            return
+        self.stdout.write(f"Executando migrações pendentes ({len(plan)})...")
+        call_command('migrate', database=connection.alias, interactive=False, verbosity=verbosity)
+
+    def ensure_superuser(self, database):
+        User = get_user_model()
+        username = os.getenv('DJANGO_SUPERUSER_USERNAME', 'admin')
+        email = os.getenv('DJANGO_SUPERUSER_EMAIL', 'admin@example.com')
+        password = os.getenv('DJANGO_SUPERUSER_PASSWORD', '123456')
+
+        if User.objects.using(database).filter(username=username).exists():
+            self.stdout.write(f"Superusuário '{username}' já existe.")
+            return
+        User.objects.db_manager(database).create_superuser(username, email, password)
+        self.stdout.write(self.style.SUCCESS(f"Superusuário '{username}' criado."))
+
+    def warm_cache(self):
+        backend = settings.CACHES['default']['BACKEND']
+        if backend in LOCAL_CACHE_BACKENDS:
+            self.stdout.write(f"Cache local ({backend}) não é compartilhado com o servidor, aquecimento ignorado.")
+            return
+        try:
+            total = catalog.warm_cache()
+        except Exception as error:
+            # O cache é preenchido sob demanda, uma falha aqui não deve impedir a inicialização
+            self.stderr.write(f"Não foi possível aquecer o cache de produtos: {error}")
+            return
+        self.stdout.write(f"{total} produtos carregados no cache.")
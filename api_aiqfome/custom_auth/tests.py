@@ -1,3 +1,104 @@
+import os
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
 from django.test import TestCase
 
-# Create your tests here.
+from benchmarks.stub_catalog import StubCatalog
+from custom_auth.management.commands import bootstrap
+from customers import catalog
+from customers.models import CustomerDeactivation
+
+
+class BootstrapCommandTests(TestCase):
+    def run_bootstrap(self, *args):
+        out = StringIO()
+        call_command('bootstrap', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_bootstrap_creates_superuser_once(self):
+        """O bootstrap cria o superusuário apenas na primeira execução"""
+        output = self.run_bootstrap()
+        self.assertIn("Nenhuma migração pendente.", output)
+        self.assertIn("Superusuário 'admin' criado.", output)
+
+        user = User.objects.get(username='admin')
+        self.assertTrue(user.is_superuser)
+        self.assertTrue(user.check_password('123456'))
+
+        output = self.run_bootstrap()
+        self.assertIn("Superusuário 'admin' já existe.", output)
+        self.assertEqual(1, User.objects.filter(username='admin').count())
+
+    def test_bootstrap_superuser_from_environment(self):
+        """Os dados do superusuário podem ser informados por variáveis de ambiente"""
+        environ = {
+            'DJANGO_SUPERUSER_USERNAME': 'root',
+            'DJANGO_SUPERUSER_EMAIL': 'root@example.com',
+            'DJANGO_SUPERUSER_PASSWORD': 'segredo-123',
+        }
+        with mock.patch.dict(os.environ, environ):
+            self.run_bootstrap()
+
+        user = User.objects.get(username='root')
+        self.assertEqual('root@example.com', user.email)
+        self.assertTrue(user.check_password('segredo-123'))
+
+        self.run_bootstrap('--skip-superuser')
+        self.assertFalse(User.objects.filter(username='admin').exists())
+
+    @mock.patch.object(bootstrap.time, 'sleep')
+    def test_bootstrap_waits_for_database(self, sleep):
+        """O bootstrap tenta conectar novamente com espera crescente"""
+        command = bootstrap.Command(stdout=StringIO())
+        database = mock.Mock()
+        database.ensure_connection.side_effect = [OperationalError('indisponível')] * 3 + [None]
+        command.wait_for_database(database, timeout=60)
+        self.assertEqual([0.1, 0.2, 0.4], [call.args[0] for call in sleep.call_args_list])
+        self.assertEqual(3, database.close.call_count)
+
+        database.ensure_connection.side_effect = OperationalError('indisponível')
+        with self.assertRaises(CommandError):
+            command.wait_for_database(database, timeout=0)
+
+    def test_bootstrap_warm_cache(self):
+        """O aquecimento carrega os produtos no cache apenas quando o cache é compartilhado"""
+        cache.clear()
+        with StubCatalog(products=5) as stub, mock.patch.dict(os.environ, {'URL_EXTERNAL_API': stub.url}):
+            output = self.run_bootstrap('--skip-superuser', '--warm-cache')
+            self.assertIn("aquecimento ignorado", output)
+            self.assertIsNone(cache.get(catalog.cache_key(1)))
+
+            with mock.patch.object(bootstrap, 'LOCAL_CACHE_BACKENDS', ()):
+                output = self.run_bootstrap('--skip-superuser', '--warm-cache')
+            self.assertIn("5 produtos carregados no cache.", output)
+            self.assertEqual(1, stub.requests)
+        self.assertEqual(1, cache.get(catalog.cache_key(1))['id'])
+
+
+class CustomerAdminTests(TestCase):
+    def test_admin_deactivation_is_recorded(self):
+        """Desativar o usuário pelo admin registra a data da desativação utilizada pelo arquivamento"""
+        admin = User.objects.create_superuser('admin', 'admin@example.com', '123456')
+        user = User.objects.create_user(username='user', email='user@example.com', first_name='Nome')
+        self.client.force_login(admin)
+
+        response = self.client.post(f'/admin/auth/user/{user.pk}/change/', {
+            'username': 'user',
+            'email': 'user@example.com',
+            'first_name': 'Novo',
+            'last_name': '',
+            'date_joined_0': user.date_joined.strftime('%Y-%m-%d'),
+            'date_joined_1': user.date_joined.strftime('%H:%M:%S'),
+        })
+        self.assertEqual(302, response.status_code)
+
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+        self.assertEqual('Novo', user.first_name)
+        self.assertTrue(CustomerDeactivation.objects.filter(user=user).exists())
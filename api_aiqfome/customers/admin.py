@@ -1,3 +1,21 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import FavoriteProduct
+from .pagination import EstimatedCountPaginator
+
+
+@admin.register(FavoriteProduct)
+class FavoriteProductAdmin(admin.ModelAdmin):
+    """
+    Admin dos produtos favoritos preparado para tabelas com milhões de registros:
+    sem COUNT(*) na listagem, sem lista de usuários no formulário e com busca
+    apenas por campos indexados do cliente (username exato ou e-mail).
+    """
+    list_display = ['id', 'user', 'product_id', 'created_at', 'changed_at', 'deleted_at']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    search_fields = ['user__username__exact', '=user__email']
+    search_help_text = 'Username ou e-mail do cliente'
+    sortable_by = ['id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
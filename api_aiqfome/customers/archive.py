@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedFavoriteProduct, CustomerDeactivation, FavoriteProduct, OutboxEvent
+from .outbox import favorite_event
+
+
+def deactivate_customer(user):
+    """
+    Desativa o cliente registrando a data da desativação. Um cliente já desativado
+    mantém a data original.
+    """
+    with transaction.atomic():
+        if user.is_active:
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            CustomerDeactivation.objects.update_or_create(user=user, defaults={'deactivated_at': timezone.now()})
+        else:
+            CustomerDeactivation.objects.get_or_create(user=user)
+
+
+def inactive_users(inactive_days):
+    """Clientes desativados há mais de 'inactive_days' dias."""
+    cutoff = timezone.now() - timedelta(days=inactive_days)
+    return User.objects.filter(is_active=False, deactivation__deactivated_at__lt=cutoff)
+
+
+def archive_batch(users, batch_size):
+    """Move um lote de favoritos para a tabela de arquivo em uma transação curta."""
+    with transaction.atomic():
+        favorites = list(
+            FavoriteProduct.objects.filter(user_id__in=users.values('id'))
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values('id', 'user_id', 'product_id', 'created_at', 'deleted_at')[:batch_size]
+        )
+        if not favorites:
+            return 0
+
+        ArchivedFavoriteProduct.objects.bulk_create([
+            ArchivedFavoriteProduct(
+                user_id=favorite['user_id'],
+                product_id=favorite['product_id'],
+                created_at=favorite['created_at'],
+                deleted_at=favorite['deleted_at'],
+            )
+            for favorite in favorites
+        ])
+        # Os sistemas externos são avisados da remoção dos favoritos ativos (os tombstones já foram avisados)
+        now = timezone.now()
+        OutboxEvent.objects.bulk_create([
+            favorite_event(OutboxEvent.FAVORITE_REMOVED, favorite['user_id'], favorite['product_id'], now)
+            for favorite in favorites
+            if favorite['deleted_at'] is None
+        ])
+        FavoriteProduct.objects.filter(id__in=[favorite['id'] for favorite in favorites]).delete()
+        return len(favorites)
+
+
+def archive_inactive_favorites(inactive_days=180, batch_size=1000, pause=0.0, max_batches=None):
+    """
+    Arquiva os favoritos dos clientes desativados em lotes, cada um em sua própria transação,
+    evitando bloqueios longos na tabela de favoritos. Retorna a quantidade de registros movidos.
+    """
+    users = inactive_users(inactive_days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(users, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return total
@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import requests
+from django.core.cache import cache
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 3600
+# tempo máximo de espera pela API externa, em segundos
+REQUEST_TIMEOUT = 10
+# intervalo de atualização do índice de produtos e espera após uma falha, em segundos
+INDEX_TTL = 300
+INDEX_RETRY_AFTER = 30
+# tempo em que um id inexistente é lembrado
+MISSING_TIMEOUT = 300
+
+
+def cache_key(product_id):
+    return f'product_{product_id}'
+
+
+def missing_key(product_id):
+    return f'product_missing_{product_id}'
+
+
+def get_product(product_id):
+    """
+    Obtém os dados do produto na API externa, utilizando o cache 'product_{id}'.
+    Retorna None se a API não estiver configurada ou o produto não existir.
+    """
+    cached_product = cache.get(cache_key(product_id))
+    metrics.record_cache('product', hit=bool(cached_product))
+    if cached_product:
+        return cached_product
+
+    url = os.getenv("URL_EXTERNAL_API")
+    if not url:
+        return None
+
+    start = time.perf_counter()
+    try:
+        response = requests.get(f"{url}/{product_id}", timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as error:
+        metrics.record_catalog_call(time.perf_counter() - start, error=type(error).__name__)
+        raise
+    metrics.record_catalog_call(
+        time.perf_counter() - start,
+        status=response.status_code,
+        error=None if response.status_code < 500 else 'status',
+    )
+
+    if response.status_code == 200:
+        product = response.json()
+        cache.set(cache_key(product_id), product, timeout=CACHE_TIMEOUT)
+        return product
+    return None
+
+
+def fetch_products():
+    """Consulta a listagem completa de produtos da API externa."""
+    url = os.getenv("URL_EXTERNAL_API")
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as error:
+        metrics.record_catalog_call(time.perf_counter() - start, error=type(error).__name__)
+        raise
+    metrics.record_catalog_call(
+        time.perf_counter() - start,
+        status=response.status_code,
+        error=None if response.status_code < 500 else 'status',
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+class ProductIndex:
+    """
+    Ids dos produtos existentes na API externa, em um array ordenado de inteiros de 64 bits
+    (8 bytes por produto) consultado por busca binária, e os dados dos produtos recebidos na
+    listagem. O índice é recarregado em bloco a cada INDEX_TTL segundos, em uma thread em
+    segundo plano para que as requisições nunca aguardem o download da listagem.
+    """
+
+    def __init__(self, ttl=INDEX_TTL, retry_after=INDEX_RETRY_AFTER):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.thread = None
+        self.clear()
+
+    def clear(self):
+        # (url, ids, maior id, produtos) substituídos juntos para que as leituras não precisem do lock
+        self.snapshot = (None, array('q'), None, {})
+        # url da última tentativa de atualização, inclusive das que falharam
+        self.refreshed_url = None
+        self.next_refresh = 0.0
+
+    def load(self, url, product_ids, products=None):
+        ids = array('q', sorted(set(product_ids)))
+        self.snapshot = (url, ids, ids[-1] if ids else None, products or {})
+        self.refreshed_url = url
+        self.next_refresh = time.monotonic() + self.ttl
+
+    def refresh(self):
+        """Recarrega o índice a partir da listagem de produtos. Retorna os produtos recebidos."""
+        url = os.getenv("URL_EXTERNAL_API")
+        products = fetch_products()
+        self.load(url, (product['id'] for product in products), {product['id']: product for product in products})
+        return products
+
+    def refresh_if_stale(self):
+        """Inicia a atualização em segundo plano quando o índice expirou, sem aguardar o resultado."""
+        url = os.getenv("URL_EXTERNAL_API")
+        if not url or (self.refreshed_url == url and time.monotonic() < self.next_refresh):
+            return
+        # Apenas uma atualização por vez, as requisições seguem com os dados atuais
+        if not self.lock.acquire(blocking=False):
+            return
+        self.refreshed_url = url
+        self.thread = threading.Thread(target=self.refresh_in_background, name='product-index-refresh', daemon=True)
+        try:
+            self.thread.start()
+        except RuntimeError:
+            self.lock.release()
+            raise
+
+    def refresh_in_background(self):
+        try:
+            self.refresh()
+        except (requests.RequestException, ValueError) as error:
+            logger.warning("Falha ao atualizar o índice de produtos: %s", error)
+            self.next_refresh = time.monotonic() + self.retry_after
+        finally:
+            self.lock.release()
+
+    def contains(self, product_id):
+        """
+        True ou False quando o índice conhece a faixa do id. Retorna None para ids maiores que
+        o maior id conhecido (produtos criados após a última atualização) ou sem índice carregado.
+        """
+        self.refresh_if_stale()
+        url, ids, max_id, _ = self.snapshot
+        if url != os.getenv("URL_EXTERNAL_API") or max_id is None or product_id > max_id:
+            return None
+        position = bisect_left(ids, product_id)
+        return position < len(ids) and ids[position] == product_id
+
+    def get(self, product_id):
+        """Dados do produto recebidos na última atualização, ou None se o índice não possui o produto."""
+        url, _, _, products = self.snapshot
+        if url != os.getenv("URL_EXTERNAL_API"):
+            return None
+        return products.get(product_id)
+
+
+product_index = ProductIndex()
+
+
+def product_exists(product_id):
+    """
+    Verifica se o produto existe consultando o índice em memória. Apenas ids fora do índice
+    consultam a API externa, e os inexistentes são lembrados por MISSING_TIMEOUT segundos.
+    """
+    known = product_index.contains(product_id)
+    if known is not None:
+        return known
+
+    if cache.get(missing_key(product_id)):
+        return False
+    try:
+        if get_product(product_id):
+            return True
+    except ValueError:
+        # A API externa responde 200 com o corpo vazio para produtos inexistentes
+        pass
+    cache.set(missing_key(product_id), True, timeout=MISSING_TIMEOUT)
+    return False
+
+
+def warm_cache():
+    """
+    Carrega todos os produtos da API externa no cache e no índice com uma única requisição à listagem.
+    Retorna a quantidade de produtos armazenados.
+    """
+    if not os.getenv("URL_EXTERNAL_API"):
+        return 0
+    products = product_index.refresh()
+    cache.set_many({cache_key(product['id']): product for product in products}, timeout=CACHE_TIMEOUT)
+    return len(products)
@@ -0,0 +1,65 @@
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+
+from .models import FavoriteProduct
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+FIELDS = ['id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active', 'date_joined']
+FAVORITES_FIELD = 'favorite_product_ids'
+
+
+class Echo:
+    """Objeto com a interface de arquivo que apenas devolve o que é escrito, usado com o csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(include_favorites=False, chunk_size=2000):
+    """
+    Percorre os clientes com cursor no servidor, mantendo o uso de memória constante.
+    Os produtos favoritos são agregados no próprio banco com uma subconsulta por cliente.
+    """
+    fields = list(FIELDS)
+    queryset = User.objects.order_by('id')
+    if include_favorites:
+        favorites = FavoriteProduct.objects.active().filter(user=OuterRef('pk')).order_by('product_id')
+        queryset = queryset.annotate(**{FAVORITES_FIELD: ArraySubquery(favorites.values('product_id'))})
+        fields.append(FAVORITES_FIELD)
+
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield dict(zip(fields, row))
+
+
+def render_csv(rows, include_favorites=False):
+    fields = FIELDS + [FAVORITES_FIELD] if include_favorites else FIELDS
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        if include_favorites:
+            row[FAVORITES_FIELD] = ' '.join(str(product_id) for product_id in row[FAVORITES_FIELD])
+        yield writer.writerow([row[field] for field in fields])
+
+
+def render_jsonl(rows, include_favorites=False):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def export(file_format, include_favorites=False, chunk_size=2000, buffer_size=64 * 1024):
+    """Gera o conteúdo da exportação em blocos de aproximadamente 'buffer_size' caracteres."""
+    render = render_csv if file_format == 'csv' else render_jsonl
+    buffer, size = [], 0
+    for line in render(export_rows(include_favorites, chunk_size), include_favorites):
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,25 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+TRUE_VALUES = ('1', 'true')
+FALSE_VALUES = ('0', 'false')
+
+
+class CustomerFilter(BaseFilterBackend):
+    """Filtros exatos de clientes: 'email' (sem diferenciar maiúsculas), 'is_active' e 'is_staff'."""
+    boolean_fields = ('is_active', 'is_staff')
+
+    def filter_queryset(self, request, queryset, view):
+        email = request.query_params.get('email')
+        if email:
+            queryset = queryset.filter(email__iexact=email)
+
+        for field in self.boolean_fields:
+            value = request.query_params.get(field)
+            if value is None:
+                continue
+            value = value.lower()
+            if value not in TRUE_VALUES + FALSE_VALUES:
+                raise ValidationError({field: ["Must be a valid boolean."]})
+            queryset = queryset.filter(**{field: value in TRUE_VALUES})
+        return queryset
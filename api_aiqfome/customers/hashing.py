@@ -0,0 +1,10 @@
+"""
+Inicialização dos processos que geram os hashes das senhas na importação de clientes.
+Os processos são iniciados com 'spawn' e carregam este módulo antes do django.setup(),
+por isso ele não pode importar models.
+"""
+import django
+
+
+def setup_worker():
+    django.setup()
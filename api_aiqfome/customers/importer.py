@@ -0,0 +1,172 @@
+import codecs
+import csv
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .hashing import setup_worker
+from .serializers import CustomerImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename):
+    """Identifica o formato do arquivo pela extensão."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else None
+
+
+def read_rows(lines, file_format):
+    """Lê as linhas de um arquivo CSV ou JSONL retornando (número da linha, dados) sob demanda."""
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Colunas vazias são tratadas como campos não informados
+            yield reader.line_num, {name: value for name, value in row.items() if name and value not in ('', None)}
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def save_upload(file, file_format):
+    """
+    Grava o arquivo enviado em CUSTOMER_IMPORT['UPLOAD_DIR'] para ser importado pela fila de jobs.
+    A codificação é verificada durante a gravação. Lança UnicodeDecodeError se não for UTF-8.
+    """
+    directory = settings.CUSTOMER_IMPORT['UPLOAD_DIR']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.{file_format}')
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        with open(path, 'wb') as destination:
+            for chunk in file.chunks():
+                decoder.decode(chunk)
+                destination.write(chunk)
+            decoder.decode(b'', final=True)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+class CustomerImporter:
+    """
+    Importa clientes em lote: valida em blocos, verifica username/e-mail com consultas
+    por conjunto, gera os hashes das senhas em paralelo e insere com bulk_create.
+    Executado pelo comando 'import_customers' ou pela fila de jobs, nunca no processo web.
+    """
+
+    def __init__(self, chunk_size=1000, batch_size=500, workers=1):
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.workers = workers
+        self.executor = None
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.report = {'total': 0, 'created': 0, 'errors': []}
+
+    def run(self, rows):
+        if self.workers > 1:
+            # 'spawn' evita o fork de um processo com threads (ex: sinal do worker da fila de jobs)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=setup_worker,
+            )
+        try:
+            rows = iter(rows)
+            while chunk := list(islice(rows, self.chunk_size)):
+                self._import_chunk(chunk)
+        finally:
+            if self.executor:
+                self.executor.shutdown()
+                self.executor = None
+        return self.report
+
+    def _error(self, number, errors):
+        self.report['errors'].append({'row': number, 'errors': errors})
+
+    def _validate(self, chunk):
+        valid = []
+        for number, row in chunk:
+            self.report['total'] += 1
+            if row is None:
+                self._error(number, {'non_field_errors': ['Linha inválida.']})
+                continue
+
+            serializer = CustomerImportSerializer(data=row)
+            if not serializer.is_valid():
+                self._error(number, serializer.errors)
+                continue
+            valid.append((number, serializer.validated_data))
+        return valid
+
+    def _check_unique(self, valid):
+        usernames = {data['username'] for _, data in valid}
+        emails = {data['email'] for _, data in valid}
+        existing_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        existing_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        unique = []
+        for number, data in valid:
+            errors = {}
+            if data['username'] in existing_usernames or data['username'] in self.seen_usernames:
+                errors['username'] = ['A user with that username already exists.']
+            if data['email'] in existing_emails or data['email'] in self.seen_emails:
+                errors['email'] = ['This field must be unique.']
+            if errors:
+                self._error(number, errors)
+                continue
+            self.seen_usernames.add(data['username'])
+            self.seen_emails.add(data['email'])
+            unique.append((number, data))
+        return unique
+
+    def _hash_passwords(self, passwords):
+        if self.executor is None:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.executor.map(make_password, passwords, chunksize=chunksize))
+
+    def _import_chunk(self, chunk):
+        unique = self._check_unique(self._validate(chunk))
+        if not unique:
+            return
+
+        hashes = self._hash_passwords([data['password'] for _, data in unique])
+        users = []
+        for (number, data), password in zip(unique, hashes):
+            fields = {name: value for name, value in data.items() if name != 'password'}
+            users.append((number, User(password=password, **fields)))
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in users], batch_size=self.batch_size)
+            self.report['created'] += len(users)
+        except IntegrityError:
+            # Algum registro foi criado por outro processo no meio da importação
+            self._insert_one_by_one(users)
+
+    def _insert_one_by_one(self, users):
+        for number, user in users:
+            try:
+                with transaction.atomic():
+                    user.save()
+                self.report['created'] += 1
+            except IntegrityError:
+                self._error(number, {'non_field_errors': ['Usuário ou e-mail já cadastrado.']})
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from customers.archive import archive_inactive_favorites
+
+
+class Command(BaseCommand):
+    help = "Move os produtos favoritos de clientes desativados há muito tempo para a tabela de arquivo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inactive-days', type=int, default=180, help="Dias desde a desativação do cliente")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Favoritos movidos por transação")
+        parser.add_argument('--pause', type=float, default=0.0, help="Pausa em segundos entre os lotes")
+        parser.add_argument('--max-batches', type=int, help="Quantidade máxima de lotes nesta execução")
+
+    def handle(self, *args, **options):
+        total = archive_inactive_favorites(
+            inactive_days=options['inactive_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} produtos favoritos arquivados."))
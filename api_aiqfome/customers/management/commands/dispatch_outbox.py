@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from customers.outbox import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = "Entrega os eventos de alteração dos favoritos gravados no outbox ao destino configurado em OUTBOX['SINK']"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Eventos entregues por lote")
+        parser.add_argument('--once', action='store_true', help="Encerra quando não houver mais eventos pendentes")
+        parser.add_argument('--max-batches', type=int, help="Quantidade máxima de lotes nesta execução")
+
+    def handle(self, *args, **options):
+        total = dispatch_outbox(
+            batch_size=options['batch_size'],
+            once=options['once'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} eventos entregues."))
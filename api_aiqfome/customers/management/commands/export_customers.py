@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from customers import exporter
+
+
+class Command(BaseCommand):
+    help = "Exporta todos os clientes em CSV ou JSONL com uso de memória constante"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=exporter.FORMATS, default='csv')
+        parser.add_argument('--favorites', action='store_true', help="Inclui os produtos favoritos de cada cliente")
+        parser.add_argument('--output', help="Arquivo de destino (padrão: saída padrão)")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Registros lidos do cursor por vez")
+
+    def handle(self, *args, **options):
+        chunks = exporter.export(options['format'], options['favorites'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.importer import FORMATS, CustomerImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa clientes em lote a partir de um arquivo CSV ou JSONL"
+
+    def add_arguments(self, parser):
+        options = settings.CUSTOMER_IMPORT
+        parser.add_argument('path', help="Caminho do arquivo a ser importado")
+        parser.add_argument('--format', choices=FORMATS, help="Formato do arquivo (padrão: extensão do arquivo)")
+        parser.add_argument('--chunk-size', type=int, default=options['CHUNK_SIZE'])
+        parser.add_argument('--batch-size', type=int, default=options['BATCH_SIZE'])
+        parser.add_argument('--workers', type=int, default=options['WORKERS'])
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        if not file_format:
+            raise CommandError("Não foi possível identificar o formato do arquivo, informe --format.")
+
+        importer = CustomerImporter(
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+        )
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                report = importer.run(read_rows(file, file_format))
+        except (OSError, UnicodeDecodeError) as error:
+            raise CommandError(str(error))
+
+        for error in report['errors']:
+            self.stderr.write(f"Linha {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} de {report['total']} clientes importados, {len(report['errors'])} com erro."
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoriteproduct',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Data da última alteração (inclusão ou remoção)'),
+        ),
+        migrations.AddField(
+            model_name='favoriteproduct',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Data em que o produto foi favoritado'),
+        ),
+        migrations.AddField(
+            model_name='favoriteproduct',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, help_text='Data da remoção (tombstone)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='favoriteproduct',
+            index=models.Index(fields=['user', 'changed_at'], name='favorite_user_changed_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# Índices da tabela auth_user utilizados pela busca e pelos filtros de CustomerViewSet.
+# As expressões correspondem ao SQL gerado pelo Django para os lookups iexact/icontains no PostgreSQL.
+EMAIL_INDEX = (
+    'auth_user_email_upper_idx',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_email_upper_idx ON auth_user (UPPER("email"::text))',
+)
+
+TRIGRAM_INDEXES = [
+    (
+        f'auth_user_{column}_trgm_idx',
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_{column}_trgm_idx '
+        f'ON auth_user USING gin (UPPER("{column}"::text) gin_trgm_ops)',
+    )
+    for column in ('username', 'email', 'first_name', 'last_name')
+]
+
+
+def trigram_available(cursor):
+    cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    return cursor.fetchone() is not None
+
+
+def create_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(EMAIL_INDEX[1])
+
+        # Imagens do PostgreSQL sem o pacote contrib não possuem a extensão pg_trgm
+        if not trigram_available(cursor):
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for _, sql in TRIGRAM_INDEXES:
+            cursor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for name, _ in [EMAIL_INDEX] + TRIGRAM_INDEXES:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode ser executado dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('customers', '0002_favorite_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
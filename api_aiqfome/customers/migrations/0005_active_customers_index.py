@@ -0,0 +1,20 @@
+from django.db import migrations
+
+# Índice parcial com apenas os clientes ativos, utilizado pela listagem de CustomerViewSet
+# (WHERE is_active ORDER BY id). Clientes desativados não ocupam espaço no índice.
+CREATE_INDEX = 'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_active_id_idx ON auth_user (id) WHERE is_active'
+DROP_INDEX = 'DROP INDEX CONCURRENTLY IF EXISTS auth_user_active_id_idx'
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode ser executado dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('customers', '0004_archived_favorites'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# Converte customers_favoriteproduct em uma tabela particionada por hash do user_id.
+# O model não muda: a chave primária passa a ser (id, user_id), pois no PostgreSQL a chave
+# de partição precisa fazer parte das chaves únicas, e o id continua único por ser gerado
+# por uma sequência. As consultas filtradas por usuário acessam apenas uma partição.
+#
+# A migração copia todos os registros dentro de uma transação e bloqueia a tabela durante
+# a cópia. Em bases grandes execute-a em uma janela de manutenção.
+TABLE = 'customers_favoriteproduct'
+OLD_TABLE = f'{TABLE}_old'
+SEQUENCE = f'{TABLE}_id_seq'
+PARTITIONS = 16
+
+
+def table_definition(cursor):
+    """Constraints e índices atuais da tabela, para serem recriados com os mesmos nomes."""
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f') ORDER BY contype",
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+        [TABLE, TABLE],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    return constraints, indexes
+
+
+def copy_table(cursor, partitioned):
+    constraints, indexes = table_definition(cursor)
+
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+    if partitioned:
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE}) PARTITION BY HASH (user_id)')
+        for remainder in range(PARTITIONS):
+            cursor.execute(
+                f'CREATE TABLE {TABLE}_p{remainder} PARTITION OF {TABLE} '
+                f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+            )
+    else:
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE})')
+
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+    # Remove a tabela antiga junto com a sequência e as partições que pertencem a ela
+    cursor.execute(f'DROP TABLE {OLD_TABLE} CASCADE')
+
+    if partitioned:
+        # Colunas identity não são suportadas em tabelas particionadas antes do PostgreSQL 17
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    else:
+        cursor.execute(f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = 'PRIMARY KEY (id, user_id)' if partitioned else 'PRIMARY KEY (id)'
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+    for definition in indexes:
+        cursor.execute(definition)
+
+
+def partition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        copy_table(cursor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        copy_table(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_active_customers_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_existing_deactivations(apps, schema_editor):
+    """
+    Clientes já desativados não possuem a data da desativação. A contagem do
+    arquivamento começa na data da migração, nunca antes da desativação real.
+    """
+    User = apps.get_model('auth', 'User')
+    CustomerDeactivation = apps.get_model('customers', 'CustomerDeactivation')
+    now = django.utils.timezone.now()
+    inactive = User.objects.filter(is_active=False).values_list('id', flat=True).iterator(chunk_size=2000)
+    batch = []
+    for user_id in inactive:
+        batch.append(CustomerDeactivation(user_id=user_id, deactivated_at=now))
+        if len(batch) >= 2000:
+            CustomerDeactivation.objects.bulk_create(batch)
+            batch = []
+    CustomerDeactivation.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('customers', '0008_favorite_tombstone_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerDeactivation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='deactivation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('deactivated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(record_existing_deactivations, migrations.RunPython.noop),
+    ]
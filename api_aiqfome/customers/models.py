@@ -1,13 +1,120 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class FavoriteProductQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def tombstones(self):
+        return self.filter(deleted_at__isnull=False)
 
 
 class FavoriteProduct(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorite_products')
     product_id = models.BigIntegerField(help_text="Identificador do Produto", default=1)
+    created_at = models.DateTimeField(default=timezone.now, help_text="Data em que o produto foi favoritado")
+    changed_at = models.DateTimeField(default=timezone.now, help_text="Data da última alteração (inclusão ou remoção)")
+    deleted_at = models.DateTimeField(null=True, blank=True, help_text="Data da remoção (tombstone)")
+
+    objects = FavoriteProductQuerySet.as_manager()
 
     class Meta:
         unique_together = ('user', 'product_id')
+        indexes = [
+            models.Index(fields=['user', 'changed_at'], name='favorite_user_changed_idx'),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='favorite_tombstone_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} -> {self.product.name}"
\ No newline at end of file
+        return f"{self.user.username} -> {self.product_id}"
+
+    def mark_deleted(self):
+        """Remove o favorito deixando um tombstone para a sincronização incremental."""
+        now = timezone.now()
+        self.deleted_at = now
+        self.changed_at = now
+        self.save(update_fields=['deleted_at', 'changed_at'])
+
+    def restore(self):
+        """Reativa um favorito removido anteriormente."""
+        now = timezone.now()
+        self.deleted_at = None
+        self.created_at = now
+        self.changed_at = now
+        self.save(update_fields=['deleted_at', 'created_at', 'changed_at'])
+
+
+class CustomerDeactivation(models.Model):
+    """Data em que o cliente foi desativado, utilizada pelo arquivamento dos favoritos."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='deactivation')
+    deactivated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} desativado em {self.deactivated_at:%Y-%m-%d}"
+
+
+class ArchivedFavoriteProduct(models.Model):
+    """Favoritos de clientes desativados há muito tempo, movidos para fora da tabela principal."""
+    user_id = models.BigIntegerField(db_index=True)
+    product_id = models.BigIntegerField()
+    created_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.product_id}"
+
+
+class OutboxEventQuerySet(models.QuerySet):
+    def pending(self):
+        """Eventos ainda não entregues cuja próxima tentativa já pode ser feita."""
+        return self.filter(failed_at__isnull=True, available_at__lte=timezone.now())
+
+
+class OutboxEvent(models.Model):
+    """
+    Eventos de alteração dos favoritos, gravados na mesma transação da alteração
+    e entregues aos sistemas externos pelo comando 'dispatch_outbox'.
+    """
+    FAVORITE_ADDED = 'favorite.added'
+    FAVORITE_REMOVED = 'favorite.removed'
+    EVENT_TYPES = [
+        (FAVORITE_ADDED, 'Produto favoritado'),
+        (FAVORITE_REMOVED, 'Produto removido dos favoritos'),
+    ]
+
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPES)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Data da próxima tentativa de entrega")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True, help_text="Data em que as tentativas de entrega se esgotaram")
+
+    objects = OutboxEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(failed_at__isnull=True),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk}"
+
+    def as_message(self):
+        return {
+            'id': self.pk,
+            'type': self.event_type,
+            'created_at': self.created_at.isoformat(),
+            'data': self.payload,
+        }
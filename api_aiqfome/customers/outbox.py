@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+from .sync import encode_token
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SINK = {
+    'BACKEND': 'customers.outbox.FileSink',
+    'OPTIONS': {'path': os.path.join(tempfile.gettempdir(), 'api_aiqfome', 'outbox.jsonl')},
+}
+
+
+def favorite_event(event_type, user_id, product_id, changed_at):
+    """Evento de alteração do favorito, ainda não gravado (permite gravar vários com bulk_create)."""
+    return OutboxEvent(
+        event_type=event_type,
+        payload={
+            'user_id': user_id,
+            'product_id': product_id,
+            'changed_at': changed_at.isoformat(),
+            # mesmo token da sincronização incremental, permite ordenar e descartar eventos repetidos
+            'token': encode_token(changed_at),
+        },
+    )
+
+
+def record_favorite_event(event_type, favorite):
+    """Grava o evento de alteração do favorito. Deve ser chamado dentro da transação da alteração."""
+    event = favorite_event(event_type, favorite.user_id, favorite.product_id, favorite.changed_at)
+    event.save()
+    return event
+
+
+class MemorySink:
+    """Mantém os eventos em uma lista do processo (testes e consumidores locais)."""
+    events = []
+
+    def __init__(self, **options):
+        pass
+
+    def send(self, messages):
+        MemorySink.events.extend(messages)
+
+
+class FileSink:
+    """Acrescenta os eventos em um arquivo JSONL, um evento por linha."""
+
+    def __init__(self, path, **options):
+        self.path = path
+
+    def send(self, messages):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for message in messages:
+                file.write(json.dumps(message) + '\n')
+
+
+class WebhookSink:
+    """Envia cada lote de eventos em um único POST com a lista em JSON."""
+
+    def __init__(self, url, timeout=5, headers=None, **options):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def send(self, messages):
+        response = requests.post(self.url, json=messages, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+
+
+def outbox_options():
+    return getattr(settings, 'OUTBOX', {})
+
+
+def get_sink():
+    config = outbox_options().get('SINK', DEFAULT_SINK)
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+def retry_delay(attempts, base, maximum):
+    """Espera exponencial entre as tentativas: base, 2*base, 4*base... limitada a 'maximum'."""
+    return min(base * 2 ** (attempts - 1), maximum)
+
+
+def dispatch_batch(sink, batch_size=100, max_attempts=10, retry_base=1.0, retry_max=300.0):
+    """
+    Entrega um lote de eventos pendentes. As linhas são bloqueadas com SKIP LOCKED, então
+    vários dispatchers podem rodar em paralelo sem entregar o mesmo evento.
+    Retorna a quantidade de eventos entregues e de eventos com falha.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.pending()
+            .select_for_update(skip_locked=True)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        try:
+            sink.send([event.as_message() for event in events])
+        except Exception as error:
+            logger.warning("Falha ao entregar %s eventos do outbox: %s", len(events), error)
+            now = timezone.now()
+            for event in events:
+                event.attempts += 1
+                event.last_error = str(error)[:1000]
+                if event.attempts >= max_attempts:
+                    event.failed_at = now
+                else:
+                    event.available_at = now + timedelta(seconds=retry_delay(event.attempts, retry_base, retry_max))
+            OutboxEvent.objects.bulk_update(events, ['attempts', 'last_error', 'failed_at', 'available_at'])
+            return 0, len(events)
+
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+        return len(events), 0
+
+
+def dispatch_outbox(sink=None, batch_size=None, once=False, max_batches=None):
+    """
+    Drena o outbox em lotes. Com 'once' para quando não houver mais eventos pendentes,
+    caso contrário aguarda POLL_INTERVAL segundos e verifica novamente.
+    Retorna a quantidade de eventos entregues.
+    """
+    options = outbox_options()
+    sink = sink or get_sink()
+    batch_size = batch_size or options.get('BATCH_SIZE', 100)
+    poll_interval = options.get('POLL_INTERVAL', 1.0)
+
+    delivered = batches = 0
+    while max_batches is None or batches < max_batches:
+        sent, failed = dispatch_batch(
+            sink,
+            batch_size=batch_size,
+            max_attempts=options.get('MAX_ATTEMPTS', 10),
+            retry_base=options.get('RETRY_DELAY', 1.0),
+            retry_max=options.get('MAX_RETRY_DELAY', 300.0),
+        )
+        delivered += sent
+        batches += 1
+
+        if sent + failed < batch_size:
+            # Lote incompleto: não há mais eventos disponíveis no momento
+            if once:
+                break
+            time.sleep(poll_interval)
+        elif failed:
+            time.sleep(poll_interval)
+    return delivered
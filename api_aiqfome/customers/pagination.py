@@ -0,0 +1,62 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class CustomerCursorPagination(CursorPagination):
+    """
+    Paginação por cursor ordenada pelo id, que não executa COUNT(*) na tabela de usuários.
+    É ativada apenas quando o parâmetro '?page_size=' é informado.
+    """
+    ordering = 'id'
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator do admin que evita o COUNT(*) em tabelas grandes.
+    Sem filtros o total vem das estatísticas do PostgreSQL (pg_class.reltuples, somando as
+    partições) e com filtros da estimativa do planejador. O COUNT(*) exato só é executado
+    quando a estimativa é menor que 'exact_count_threshold'.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        with connection.cursor() as cursor:
+            if queryset.query.where:
+                estimate = self.planner_estimate(cursor, queryset)
+            else:
+                estimate = self.table_estimate(cursor, queryset.model._meta.db_table)
+
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    def table_estimate(self, cursor, table):
+        # Em tabelas particionadas as estatísticas ficam em cada partição
+        cursor.execute(
+            "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) FROM pg_class "
+            "WHERE oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass) "
+            "OR (oid = %s::regclass AND relkind <> 'p')",
+            [table, table],
+        )
+        return int(cursor.fetchone()[0])
+
+    def planner_estimate(self, cursor, queryset):
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
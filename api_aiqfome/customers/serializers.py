@@ -1,21 +1,39 @@
-import os
-import requests
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
+from rest_framework.validators import UniqueValidator, UniqueTogetherValidator
 from drf_yasg.utils import swagger_serializer_method
 from django.contrib.auth.models import User
-from django.core.cache import cache
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.urls import reverse
 from json.decoder import JSONDecodeError
 
+from . import catalog
 from .models import FavoriteProduct
 
+# Campos preenchidos com os dados da API externa de produtos
+PRODUCT_FIELDS = ('title', 'image', 'price', 'rating_rate', 'rating_count')
 
-class CustomerSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    """Permite ao cliente escolher os campos retornados via '?fields=campo1,campo2' nas consultas."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        fields = request.query_params.get('fields')
+        if not fields:
+            return
+
+        requested = {name.strip() for name in fields.split(',')}
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
-    email = serializers.EmailField(
-        required=True,
-        validators=[UniqueValidator(queryset=User.objects.all())]
-    )
+    email = serializers.EmailField(required=True)
     first_name = serializers.CharField(required=True)
     last_name =  serializers.CharField(required=True)
 
@@ -30,17 +48,61 @@ class CustomerSerializer(serializers.ModelSerializer):
         user.save()
         return user
         
+    def validate_email(self, value):
+        # A consulta de unicidade só é necessária quando o e-mail é alterado
+        if self.instance is not None and self.instance.email == value:
+            return value
+        UniqueValidator(queryset=User.objects.all())(value, self.fields['email'])
+        return value
+
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+        changed_fields = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+        for attr in changed_fields:
+            setattr(instance, attr, validated_data[attr])
+
+        # A senha só é processada quando enviada (PATCH sem senha não gera hash). Conferir se é igual
+        # à atual custaria um hash completo, então a senha enviada é sempre gravada
         if password:
             instance.set_password(password)
-        instance.save()
+            changed_fields.append('password')
+
+        # Apenas as colunas alteradas são gravadas
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
         return instance
 
 
-class FavoriteProductSerializer(serializers.ModelSerializer):
+class CustomerImportSerializer(CustomerSerializer):
+    """Valida uma linha da importação em lote. A unicidade de username e e-mail é verificada pelo importador."""
+
+    class Meta(CustomerSerializer.Meta):
+        fields = ['username', 'email', 'password', 'first_name', 'last_name', 'is_staff']
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+    def validate_email(self, value):
+        # Sem a consulta de unicidade por linha: o importador confere os e-mails de cada bloco em
+        # uma única consulta antes do bulk_create e trata os conflitos restantes (IntegrityError)
+        return value
+
+
+class CustomerImportReportSerializer(serializers.Serializer):
+    total = serializers.IntegerField(help_text="Quantidade de linhas processadas")
+    created = serializers.IntegerField(help_text="Quantidade de clientes criados")
+    errors = serializers.ListField(
+        child=serializers.DictField(),
+        help_text="Erros por linha no formato {'row': número da linha, 'errors': {campo: [mensagens]}}"
+    )
+
+
+class CustomerImportJobSerializer(serializers.Serializer):
+    job_id = serializers.IntegerField(help_text="Identificador do job de importação")
+    status = serializers.CharField(help_text="Situação do job: queued, running, done ou failed")
+    report = CustomerImportReportSerializer(allow_null=True, help_text="Resultado da importação, quando concluída")
+    error = serializers.CharField(allow_blank=True, help_text="Erro que interrompeu a importação")
+
+
+class FavoriteProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     title = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
@@ -52,41 +114,43 @@ class FavoriteProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = FavoriteProduct
         fields = ['id', 'user', 'product_id', 'title', 'image', 'price', 'rating_rate', 'rating_count']
+        # Favoritos removidos permanecem como tombstone e não devem bloquear um novo cadastro
+        validators = [
+            UniqueTogetherValidator(queryset=FavoriteProduct.objects.active(), fields=['user', 'product_id'])
+        ]
 
     def create(self, validated_data):
         user = self.context['request'].user
         product_id = validated_data['product_id']
 
-        cached_product = self._get_cached_product(product_id)
-        if not cached_product:
+        # O índice em memória valida o id sem consultar a API externa
+        if not catalog.product_exists(product_id):
             raise serializers.ValidationError("Produto não encontrado")
 
-        favorite = FavoriteProduct.objects.create(
-            user=user,
-            product_id=product_id
-        )
+        favorite = FavoriteProduct.objects.tombstones().filter(user=user, product_id=product_id).first()
+        if favorite:
+            favorite.restore()
+        else:
+            favorite = FavoriteProduct.objects.create(
+                user=user,
+                product_id=product_id
+            )
+
+        # A resposta utiliza os dados do produto já carregados no índice, sem consultar a API
+        indexed_product = catalog.product_index.get(product_id)
+        if indexed_product:
+            favorite._cached_product = indexed_product
         return favorite
 
     def to_representation(self, instance):
-        instance._cached_product = self._get_cached_product(instance.product_id) or {}
+        # Só consulta a API externa se algum campo do produto foi solicitado
+        if any(name in self.fields for name in PRODUCT_FIELDS) and not hasattr(instance, '_cached_product'):
+            instance._cached_product = self._get_cached_product(instance.product_id) or {}
         return super().to_representation(instance)
 
     def _get_cached_product(self, product_id):
         try:
-            cached_product = cache.get(f'product_{product_id}')
-            if cached_product:
-                return cached_product
-
-            url = os.getenv("URL_EXTERNAL_API")
-            if not url:
-                return None
-
-            response = requests.get(f"{url}/{product_id}")
-            if response.status_code == 200:
-                cached = response.json()
-                cache.set(f'product_{product_id}', cached, timeout=3600)
-                return cached
-            return None
+            return catalog.get_product(product_id)
         except JSONDecodeError:
             raise serializers.ValidationError("Produto não encontrado")
 
@@ -97,10 +161,15 @@ class FavoriteProductSerializer(serializers.ModelSerializer):
         return obj._cached_product.get('title') if hasattr(obj, '_cached_product') else None
 
     @swagger_serializer_method(
-        serializer_or_field=serializers.CharField(help_text="Um link da imagem do produto")
+        serializer_or_field=serializers.CharField(help_text="Um link da miniatura da imagem do produto")
     )    
     def get_image(self, obj):
-        return obj._cached_product.get('image') if hasattr(obj, '_cached_product') else None
+        if not hasattr(obj, '_cached_product') or not obj._cached_product.get('image'):
+            return None
+        # A imagem é servida pelo proxy de miniaturas e não diretamente pela API externa
+        url = reverse('product-thumbnail', args=[obj.product_id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     @swagger_serializer_method(
         serializer_or_field=serializers.FloatField(help_text="Preço do produto")
@@ -119,3 +188,18 @@ class FavoriteProductSerializer(serializers.ModelSerializer):
     )
     def get_rating_count(self, obj):
         return obj._cached_product.get('rating').get('count') if hasattr(obj, '_cached_product') else None
+
+
+class FavoriteProductSyncSerializer(serializers.Serializer):
+    token = serializers.CharField(help_text="Token a ser enviado no parâmetro 'since' da próxima sincronização")
+    full = serializers.BooleanField(
+        help_text="A lista completa foi enviada e substitui os favoritos sincronizados anteriormente"
+    )
+    added = FavoriteProductSerializer(many=True, help_text="Produtos favoritados após o token informado")
+    removed = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text=(
+            "Identificadores dos produtos removidos após o token informado. Alterações próximas ao token "
+            "podem ser enviadas novamente e devem ser aplicadas pelo product_id"
+        )
+    )
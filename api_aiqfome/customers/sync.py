@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FavoriteProduct
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def sync_options():
+    return {'OVERLAP': 60, 'TOMBSTONE_RETENTION_DAYS': 30, **getattr(settings, 'FAVORITES_SYNC', {})}
+
+
+def encode_token(changed_at):
+    """Converte a data da última alteração em um token opaco de sincronização."""
+    if changed_at is None:
+        return '0'
+    return str((changed_at - EPOCH) // MICROSECOND)
+
+
+def decode_token(token):
+    """Converte o token de sincronização de volta para data. Lança ValueError se for inválido."""
+    microseconds = int(token)
+    if microseconds < 0:
+        raise ValueError(token)
+    return EPOCH + microseconds * MICROSECOND
+
+
+def changes_since(queryset, since):
+    """
+    Alterações posteriores ao token. O 'changed_at' é definido pelo relógio do servidor antes
+    do commit, então uma alteração pode ficar visível depois de um token já entregue (commit
+    demorado ou relógio atrasado). Por isso os últimos OVERLAP segundos antes do token são lidos
+    novamente a cada sincronização, a mesma alteração pode ser retornada mais de uma vez.
+    Retorna None quando o token é mais antigo que a retenção dos tombstones e a lista completa
+    precisa ser enviada.
+    """
+    options = sync_options()
+    if since < timezone.now() - timedelta(days=options['TOMBSTONE_RETENTION_DAYS']):
+        return None
+    return queryset.filter(changed_at__gt=since - timedelta(seconds=options['OVERLAP']))
+
+
+def prune_tombstones(retention_days=None, batch_size=1000, max_batches=None):
+    """
+    Remove em lotes os tombstones mais antigos que a retenção. Clientes com tokens anteriores
+    à retenção recebem a lista completa na próxima sincronização. Retorna a quantidade removida.
+    """
+    if retention_days is None:
+        retention_days = sync_options()['TOMBSTONE_RETENTION_DAYS']
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            ids = list(
+                FavoriteProduct.objects.tombstones().filter(deleted_at__lt=cutoff)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += FavoriteProduct.objects.filter(id__in=ids, deleted_at__lt=cutoff).delete()[0]
+        batches += 1
+    return total
@@ -0,0 +1,45 @@
+import os
+
+from django.conf import settings
+
+from jobs.registry import task
+
+from . import archive, catalog, sync
+from .importer import CustomerImporter, read_rows
+
+
+@task('customers.refresh_catalog', concurrency=1)
+def refresh_catalog():
+    """Atualiza as entradas 'product_{id}' do cache com uma única consulta à listagem da API externa."""
+    return catalog.warm_cache()
+
+
+@task('customers.archive_inactive_favorites', concurrency=1)
+def archive_inactive_favorites(inactive_days=180, batch_size=1000):
+    """Arquiva os favoritos dos clientes desativados há muito tempo."""
+    return archive.archive_inactive_favorites(inactive_days=inactive_days, batch_size=batch_size)
+
+
+@task('customers.prune_tombstones', concurrency=1)
+def prune_tombstones(batch_size=1000):
+    """Remove os tombstones de favoritos mais antigos que a retenção da sincronização."""
+    return sync.prune_tombstones(batch_size=batch_size)
+
+
+@task('customers.import_customers', max_attempts=1)
+def import_customers(path, file_format):
+    """Importa o arquivo recebido pelo endpoint de importação, removendo-o ao final. Retorna o relatório."""
+    options = settings.CUSTOMER_IMPORT
+    importer = CustomerImporter(
+        chunk_size=options['CHUNK_SIZE'],
+        batch_size=options['BATCH_SIZE'],
+        workers=options['WORKERS'],
+    )
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            return importer.run(read_rows(file, file_format))
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
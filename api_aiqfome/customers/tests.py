@@ -1,11 +1,53 @@
+import io
+import json
 import os
+import re
 import requests
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock, skipIf
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth.hashers import get_hasher
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Max
+from django.utils import timezone
+from datetime import timedelta
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.stub_catalog import StubCatalog
+from customers import catalog, thumbnails
+from customers.archive import deactivate_customer
+from customers.models import ArchivedFavoriteProduct, CustomerDeactivation, FavoriteProduct, OutboxEvent
+from customers.outbox import MemorySink, WebhookSink, dispatch_batch, dispatch_outbox, record_favorite_event
+from customers.pagination import EstimatedCountPaginator
+from customers.serializers import FavoriteProductSerializer
+from customers.sync import decode_token, encode_token, prune_tombstones
+from jobs.models import Job
+from jobs.worker import Worker
+
+
+class StubCatalogMixin:
+    """Sobe a API de produtos local para a classe de testes, os testes não dependem da API externa."""
+    catalog_products = 20
+    catalog_latency = 0.0
 
-from customers.models import FavoriteProduct
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.catalog = StubCatalog(products=cls.catalog_products, latency=cls.catalog_latency).start()
+        cls.addClassCleanup(cls.catalog.stop)
+        environ = mock.patch.dict(os.environ, {'URL_EXTERNAL_API': cls.catalog.url})
+        environ.start()
+        cls.addClassCleanup(environ.stop)
 
 
 class CustomerIntegrationTests(APITestCase):
@@ -45,6 +87,73 @@ class CustomerIntegrationTests(APITestCase):
         self.assertEqual(len(response_data), 2)
 
 
+    def test_list_customers_with_fields(self):
+        """O parâmetro 'fields' limita os campos retornados"""
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/', {'fields': 'id,username'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for customer in response.json():
+            self.assertEqual({'id', 'username'}, set(customer))
+
+    def test_list_customers_search(self):
+        """A busca considera parte do username, e-mail, nome e sobrenome"""
+        User.objects.create_user(username='maria', email='maria@example.com', first_name='Maria', last_name='Souza')
+        User.objects.create_user(username='joao', email='joao@example.com', first_name='João', last_name='Souza')
+
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/', {'search': 'souza'})
+        self.assertEqual({'maria', 'joao'}, {customer['username'] for customer in response.json()})
+
+        response = self.client.get('/customers/', {'search': 'ARIA'})
+        self.assertEqual(['maria'], [customer['username'] for customer in response.json()])
+
+    def test_list_customers_filters(self):
+        """Filtros por e-mail, is_staff e is_active"""
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/', {'email': 'USER@example.com'})
+        self.assertEqual(['user'], [customer['username'] for customer in response.json()])
+
+        response = self.client.get('/customers/', {'is_staff': 'true'})
+        self.assertEqual(['admin'], [customer['username'] for customer in response.json()])
+
+        response = self.client.get('/customers/', {'is_active': 'false'})
+        self.assertEqual([], response.json())
+
+        response = self.client.get('/customers/', {'is_staff': 'talvez'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_customers_pagination(self):
+        """A paginação por cursor é ativada pelo parâmetro page_size"""
+        for index in range(3):
+            User.objects.create_user(username=f'page{index}', email=f'page{index}@example.com')
+
+        self.authenticate('admin', '123456')
+
+        usernames = []
+        response = self.client.get('/customers/', {'page_size': 2, 'search': 'page'})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response_data = response.json()
+            self.assertLessEqual(len(response_data['results']), 2)
+            usernames += [customer['username'] for customer in response_data['results']]
+            if not response_data['next']:
+                break
+            response = self.client.get(response_data['next'])
+
+        self.assertEqual(['page0', 'page1', 'page2'], usernames)
+
+    def test_customers_search_indexes(self):
+        """Os índices de e-mail sem diferenciar maiúsculas e de clientes ativos devem existir"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'auth_user'")
+            indexes = {row[0] for row in cursor.fetchall()}
+        self.assertIn('auth_user_email_upper_idx', indexes)
+        self.assertIn('auth_user_active_id_idx', indexes)
+
     def test_list_customers_with_user_not_adm(self):
         """Usuário comum não deve acessar o endpoint '/customers/'"""
         self.authenticate('user', '123456')
@@ -281,6 +390,71 @@ class CustomerIntegrationTests(APITestCase):
         self.assertIn('email', response_data)
         self.assertIn('This field must be unique.', response_data['email'])
 
+    def test_partial_update_customers_with_user_adm(self):
+        """Usuário adm pode alterar parcialmente outro usuário, gravando apenas os campos alterados"""
+        user = User.objects.create_user(
+            username='user_test', email='usertest@example.com', password='123456', first_name='first_name'
+        )
+        password = user.password
+
+        self.authenticate('admin', '123456')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/customers/{user.id}/', {'first_name': 'novo', 'email': 'usertest@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(1, len(updates))
+        self.assertIn('"first_name"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+        self.assertNotIn('"email"', updates[0])
+        # o e-mail não foi alterado, então a unicidade não é consultada
+        self.assertFalse(any('"auth_user"."email" =' in query['sql'] for query in queries.captured_queries))
+
+        user.refresh_from_db()
+        self.assertEqual('novo', user.first_name)
+        self.assertEqual('usertest@example.com', user.email)
+        self.assertEqual(password, user.password)
+
+    def test_partial_update_customers_duplicated_email(self):
+        """A alteração parcial também valida a unicidade do e-mail"""
+        user = User.objects.create_user(username='user_test', email='usertest@example.com', password='123456')
+
+        self.authenticate('admin', '123456')
+
+        response = self.client.patch(f'/customers/{user.id}/', {'email': 'user@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('This field must be unique.', response.json()['email'])
+
+    def test_update_customers_password_hashed_once(self):
+        """A senha enviada é gravada com um único hash, sem conferir a senha atual"""
+        user = User.objects.create_user(
+            username='user_test', email='usertest@example.com', password='123456',
+            first_name='first_name', last_name='last_name'
+        )
+
+        self.authenticate('admin', '123456')
+
+        payload = {
+            "username": "user_test",
+            "email": "usertest@example.com",
+            "password": "nova-senha",
+            "first_name": "first_name",
+            "last_name": "last_name"
+        }
+        hasher = get_hasher()
+        with mock.patch.object(type(hasher), 'encode', autospec=True, side_effect=type(hasher).encode) as encode, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/customers/{user.id}/', payload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, encode.call_count)
+
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(1, len(updates))
+        self.assertIn('"password"', updates[0])
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('nova-senha'))
+
     def test_delete_customers_without_authenticated(self):
         """Usuário não autenticado não deve remover usuarios"""
         user = User.objects.create_user(username='user_test', email='usertest@example.com', password='123456')
@@ -306,6 +480,71 @@ class CustomerIntegrationTests(APITestCase):
         response = self.client.delete(f'/customers/{user.id}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+        deactivated_at = CustomerDeactivation.objects.get(user=user).deactivated_at
+        self.assertLess(timezone.now() - deactivated_at, timedelta(minutes=1))
+
+        # uma nova remoção mantém a data da desativação
+        self.client.delete(f'/customers/{user.id}/')
+        self.assertEqual(deactivated_at, CustomerDeactivation.objects.get(user=user).deactivated_at)
+
+    def test_list_customers_excludes_inactive(self):
+        """Clientes desativados não são listados, exceto quando solicitados com is_active=false"""
+        User.objects.create_user(username='inactive', email='inactive@example.com', is_active=False)
+
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/')
+        self.assertNotIn('inactive', [customer['username'] for customer in response.json()])
+
+        response = self.client.get('/customers/', {'is_active': 'false'})
+        self.assertEqual(['inactive'], [customer['username'] for customer in response.json()])
+
+    def test_retrieve_inactive_customer(self):
+        """Um cliente desativado continua acessível pelo id"""
+        user = User.objects.create_user(username='inactive', email='inactive@example.com', is_active=False)
+
+        self.authenticate('admin', '123456')
+
+        response = self.client.get(f'/customers/{user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_archive_inactive_favorites_command(self):
+        """Os favoritos de clientes desativados há muito tempo são movidos para o arquivo em lotes"""
+        long_ago = timezone.now() - timedelta(days=365)
+        old = User.objects.create_user(username='old', email='old@example.com')
+        deactivate_customer(old)
+        CustomerDeactivation.objects.filter(user=old).update(deactivated_at=long_ago)
+        # desativado recentemente, mesmo sem acesso há muito tempo
+        recent = User.objects.create_user(username='recent', email='recent@example.com', last_login=long_ago)
+        User.objects.filter(id=recent.id).update(date_joined=long_ago)
+        deactivate_customer(recent)
+        active = User.objects.get(username='user')
+        User.objects.filter(id=active.id).update(date_joined=long_ago)
+
+        for user in (old, recent, active):
+            for product_id in range(1, 6):
+                FavoriteProduct.objects.create(user=user, product_id=product_id)
+        FavoriteProduct.objects.get(user=old, product_id=5).mark_deleted()
+
+        stdout = StringIO()
+        call_command('archive_inactive_favorites', inactive_days=180, batch_size=2, stdout=stdout)
+        self.assertIn('5 produtos favoritos arquivados.', stdout.getvalue())
+
+        self.assertFalse(FavoriteProduct.objects.filter(user=old).exists())
+        self.assertEqual(5, FavoriteProduct.objects.filter(user=recent).count())
+        self.assertEqual(5, FavoriteProduct.objects.filter(user=active).count())
+
+        archived = ArchivedFavoriteProduct.objects.filter(user_id=old.id)
+        self.assertEqual([1, 2, 3, 4, 5], sorted(archived.values_list('product_id', flat=True)))
+        self.assertIsNotNone(archived.get(product_id=5).deleted_at)
+
+        # a remoção dos favoritos ativos é avisada aos sistemas externos
+        events = OutboxEvent.objects.filter(event_type=OutboxEvent.FAVORITE_REMOVED)
+        self.assertEqual([1, 2, 3, 4], sorted(event.payload['product_id'] for event in events))
+        self.assertEqual({old.id}, {event.payload['user_id'] for event in events})
+
     def test_delete_customers_not_found_user(self):
         """Usuário não existe no banco de dados"""
         max_id = User.objects.aggregate(max_id=Max('id'))
@@ -316,8 +555,150 @@ class CustomerIntegrationTests(APITestCase):
         response = self.client.delete(f'/customers/{invalid_id}/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_import_customers_with_user_not_adm(self):
+        """Usuário comum não deve importar clientes"""
+        self.authenticate('user', '123456')
+
+        file = SimpleUploadedFile('customers.csv', b'username,email,password,first_name,last_name\n')
+        response = self.client.post('/customers/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_customers_with_user_adm(self):
+        """Usuário adm deve importar clientes em lote com erros reportados por linha"""
+        self.authenticate('admin', '123456')
+
+        content = (
+            '{"username": "import1", "email": "import1@example.com", "password": "pass", "first_name": "a", "last_name": "b"}\n'
+            '{"username": "import2", "email": "user@example.com", "password": "pass", "first_name": "a", "last_name": "b"}\n'
+            'not json\n'
+            '{"username": "import3", "email": "import3@example.com", "password": "pass", "first_name": "a"}\n'
+        )
+        file = SimpleUploadedFile('customers.jsonl', content.encode())
+        response = self.client.post('/customers/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        # a importação é executada pela fila de jobs, fora da requisição
+        job_id = response.json()['job_id']
+        self.assertEqual('queued', response.json()['status'])
+        self.assertTrue(response['Location'].endswith(f'/customers/import/{job_id}/'))
+        self.assertFalse(User.objects.filter(username='import1').exists())
+        path = Job.objects.get(pk=job_id).kwargs['path']
+        self.assertTrue(Worker(name='test').run_once())
+        self.assertFalse(os.path.exists(path))
+
+        response = self.client.get(f'/customers/import/{job_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('done', response.json()['status'])
+        response_data = response.json()['report']
+        self.assertEqual(4, response_data['total'])
+        self.assertEqual(1, response_data['created'])
+        errors = {error['row']: error['errors'] for error in response_data['errors']}
+        self.assertIn('email', errors[2])
+        self.assertIn('non_field_errors', errors[3])
+        self.assertIn('last_name', errors[4])
+
+        user = User.objects.get(username='import1')
+        self.assertTrue(user.check_password('pass'))
+
+    def test_import_customers_invalid_file(self):
+        """Arquivo que não está em UTF-8 é recusado sem criar o job"""
+        self.authenticate('admin', '123456')
 
-class FavoriteProductsIntegrationTests(APITestCase):
+        file = SimpleUploadedFile('customers.csv', 'username\nJoão\n'.encode('latin-1'))
+        response = self.client.post('/customers/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.filter(task='customers.import_customers').exists())
+
+        response = self.client.get('/customers/import/999999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_import_customers_invalid_format(self):
+        """Arquivo com formato não suportado"""
+        self.authenticate('admin', '123456')
+
+        file = SimpleUploadedFile('customers.xml', b'<customers/>')
+        response = self.client.post('/customers/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_customers_command(self):
+        """O comando de importação processa o CSV em blocos utilizando vários processos"""
+        content = (
+            'username,email,password,first_name,last_name,is_staff\n'
+            'csv1,csv1@example.com,pass,a,b,\n'
+            'csv2,csv2@example.com,pass,a,b,true\n'
+            'csv1,csv3@example.com,pass,a,b,\n'
+            'csv4,not-an-email,pass,a,b,\n'
+            'csv5,csv5@example.com,pass,a,b,\n'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_customers', file.name, chunk_size=2, workers=2, stdout=stdout, stderr=stderr)
+
+        self.assertIn('3 de 5 clientes importados, 2 com erro.', stdout.getvalue())
+        self.assertIn('Linha 4', stderr.getvalue())
+        self.assertIn('Linha 5', stderr.getvalue())
+        self.assertTrue(User.objects.get(username='csv2').is_staff)
+        self.assertTrue(User.objects.get(username='csv5').check_password('pass'))
+
+    def test_export_customers_with_user_not_adm(self):
+        """Usuário comum não deve exportar clientes"""
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_customers_csv(self):
+        """Exportação em CSV com os favoritos de cada cliente"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=2)
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=user, product_id=3).mark_deleted()
+
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/export/', {'favorites': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('text/csv', response['Content-Type'])
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].endswith(',favorite_product_ids'))
+        user_line = next(line for line in lines if line.split(',')[1] == 'user')
+        self.assertTrue(user_line.endswith(',1 2'))
+
+    def test_export_customers_jsonl(self):
+        """Exportação em JSONL"""
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/export/', {'file_format': 'jsonl'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual({'admin', 'user'}, {row['username'] for row in rows})
+        self.assertNotIn('favorite_product_ids', rows[0])
+        self.assertNotIn('password', rows[0])
+
+    def test_export_customers_invalid_format(self):
+        """Formato de exportação não suportado"""
+        self.authenticate('admin', '123456')
+
+        response = self.client.get('/customers/export/', {'file_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_customers_command(self):
+        """O comando de exportação escreve os clientes na saída padrão"""
+        stdout = StringIO()
+        call_command('export_customers', format='jsonl', favorites=True, chunk_size=1, stdout=stdout)
+
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(2, len(rows))
+        self.assertEqual([], rows[0]['favorite_product_ids'])
+
+
+class FavoriteProductsIntegrationTests(StubCatalogMixin, APITestCase):
     @classmethod
     def setUpTestData(cls):
         # Criação do usuario não adm
@@ -325,6 +706,7 @@ class FavoriteProductsIntegrationTests(APITestCase):
 
     def setUp(self):
         self.client = APIClient()
+        cache.clear()
 
     def authenticate(self, username, password):
         """Autenticação e configuração do token."""
@@ -368,6 +750,38 @@ class FavoriteProductsIntegrationTests(APITestCase):
         for field in ['product_id', 'title', 'image', 'price', 'rating_rate', 'rating_count']:
             self.assertIn(field, product_response)
 
+    def test_list_favorite_products_with_fields(self):
+        """Sem campos do produto na lista 'fields' a API externa não deve ser consultada"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=user, product_id=2)
+
+        self.authenticate('user', '123456')
+
+        with mock.patch.object(FavoriteProductSerializer, '_get_cached_product') as get_product:
+            response = self.client.get('/customers/favorite-products/', {'fields': 'id,product_id'})
+            get_product.assert_not_called()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_data = response.json()
+        self.assertEqual(2, len(response_data))
+        for product in response_data:
+            self.assertEqual({'id', 'product_id'}, set(product))
+
+    def test_list_favorite_products_with_product_fields(self):
+        """Campos do produto na lista 'fields' continuam sendo preenchidos"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/favorite-products/', {'fields': 'product_id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        product = response.json()[0]
+        self.assertEqual({'product_id', 'title'}, set(product))
+        self.assertIsNotNone(product['title'])
+
     def test_list_favorite_products_empty(self):
         """Usuário não possui lista de favoritos"""
         self.authenticate('user', '123456')
@@ -442,3 +856,723 @@ class FavoriteProductsIntegrationTests(APITestCase):
 
         response = self.client.delete('/customers/favorite-products/1/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_favorite_products_keeps_tombstone(self):
+        """A remoção deve manter um tombstone que não aparece na listagem"""
+        user = User.objects.get(username='user')
+        favorite = FavoriteProduct.objects.create(user=user, product_id=1)
+
+        self.authenticate('user', '123456')
+
+        response = self.client.delete(f'/customers/favorite-products/{favorite.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        favorite.refresh_from_db()
+        self.assertIsNotNone(favorite.deleted_at)
+
+        response = self.client.get('/customers/favorite-products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(0, len(response.json()))
+
+        # um tombstone não pode ser removido novamente
+        response = self.client.delete(f'/customers/favorite-products/{favorite.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_favorite_products_restores_tombstone(self):
+        """Favoritar novamente um produto removido deve reativar o registro"""
+        user = User.objects.get(username='user')
+        favorite = FavoriteProduct.objects.create(user=user, product_id=1)
+        favorite.mark_deleted()
+
+        self.authenticate('user', '123456')
+
+        response = self.client.post('/customers/favorite-products/', {'product_id': 1})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(favorite.id, response.json()['id'])
+
+        favorite.refresh_from_db()
+        self.assertIsNone(favorite.deleted_at)
+
+    def test_create_favorite_products_duplicated(self):
+        """Um produto já favoritado não pode ser adicionado novamente"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+
+        self.authenticate('user', '123456')
+
+        response = self.client.post('/customers/favorite-products/', {'product_id': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_favorite_products_without_token(self):
+        """Sem token a sincronização retorna a lista completa"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=user, product_id=2).mark_deleted()
+
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/favorite-products/sync/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_data = response.json()
+        self.assertEqual([1], [product['product_id'] for product in response_data['added']])
+        self.assertEqual([], response_data['removed'])
+        self.assertIn('token', response_data)
+
+    @override_settings(FAVORITES_SYNC={'OVERLAP': 0})
+    def test_sync_favorite_products_with_token(self):
+        """Com token a sincronização retorna apenas inclusões e remoções posteriores"""
+        user = User.objects.get(username='user')
+        kept = FavoriteProduct.objects.create(user=user, product_id=1)
+        removed = FavoriteProduct.objects.create(user=user, product_id=2)
+
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/favorite-products/sync/')
+        token = response.json()['token']
+
+        removed.mark_deleted()
+        FavoriteProduct.objects.create(user=user, product_id=3)
+
+        response = self.client.get('/customers/favorite-products/sync/', {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_data = response.json()
+        self.assertEqual([3], [product['product_id'] for product in response_data['added']])
+        self.assertEqual([2], response_data['removed'])
+        self.assertNotIn(kept.product_id, [product['product_id'] for product in response_data['added']])
+
+        self.assertFalse(response_data['full'])
+
+        # nada mudou desde o último token
+        response = self.client.get('/customers/favorite-products/sync/', {'since': response_data['token']})
+        response_data = response.json()
+        self.assertEqual(([], []), (response_data['added'], response_data['removed']))
+
+    def test_sync_favorite_products_late_commit(self):
+        """Alterações gravadas com data anterior ao token (commit demorado) são enviadas na sincronização seguinte"""
+        user = User.objects.get(username='user')
+        self.authenticate('user', '123456')
+
+        token = self.client.get('/customers/favorite-products/sync/').json()['token']
+        late = decode_token(token) - timedelta(seconds=10)
+        FavoriteProduct.objects.create(user=user, product_id=4, created_at=late, changed_at=late)
+
+        response = self.client.get('/customers/favorite-products/sync/', {'since': token})
+        self.assertEqual([4], [product['product_id'] for product in response.json()['added']])
+
+    def test_sync_favorite_products_expired_token(self):
+        """Token mais antigo que a retenção dos tombstones recebe a lista completa"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=user, product_id=2).mark_deleted()
+        self.authenticate('user', '123456')
+
+        expired = encode_token(timezone.now() - timedelta(days=31))
+        response = self.client.get('/customers/favorite-products/sync/', {'since': expired})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_data = response.json()
+        self.assertTrue(response_data['full'])
+        self.assertEqual([1], [product['product_id'] for product in response_data['added']])
+        self.assertEqual([], response_data['removed'])
+        self.assertGreater(decode_token(response_data['token']), decode_token(expired))
+
+    def test_prune_tombstones(self):
+        """Tombstones mais antigos que a retenção são removidos em lotes"""
+        user = User.objects.get(username='user')
+        old = timezone.now() - timedelta(days=31)
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=user, product_id=2).mark_deleted()
+        for product_id in (3, 4, 5):
+            FavoriteProduct.objects.create(user=user, product_id=product_id, changed_at=old, deleted_at=old)
+
+        self.assertEqual(3, prune_tombstones(retention_days=30, batch_size=2))
+        self.assertEqual([1, 2], sorted(FavoriteProduct.objects.values_list('product_id', flat=True)))
+
+    def test_sync_favorite_products_invalid_token(self):
+        """Token de sincronização inválido"""
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/favorite-products/sync/', {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_favorite_products_table_partitioned(self):
+        """A tabela de favoritos é particionada por hash do usuário"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relkind, COUNT(i.inhrelid) FROM pg_class c "
+                "LEFT JOIN pg_inherits i ON i.inhparent = c.oid "
+                "WHERE c.relname = %s GROUP BY c.relkind",
+                [FavoriteProduct._meta.db_table],
+            )
+            self.assertEqual(('p', 16), cursor.fetchone())
+
+    def test_list_favorite_products_partition_pruning(self):
+        """A listagem de favoritos deve acessar apenas a partição do usuário"""
+        user = User.objects.get(username='user')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+
+        self.authenticate('user', '123456')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/customers/favorite-products/', {'fields': 'id,product_id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        table = FavoriteProduct._meta.db_table
+        sql = next(query['sql'] for query in queries if f'FROM "{table}"' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        scanned = set(re.findall(rf'\b{table}_p\d+\b', plan))
+        self.assertEqual(1, len(scanned), plan)
+
+    def test_favorite_products_unique_constraint_partitioned(self):
+        """A restrição de unicidade (usuário, produto) continua valendo na tabela particionada"""
+        user = User.objects.get(username='user')
+        other = User.objects.create_user(username='other', email='other@example.com', password='123456')
+        FavoriteProduct.objects.create(user=user, product_id=1)
+        FavoriteProduct.objects.create(user=other, product_id=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FavoriteProduct.objects.create(user=user, product_id=1)
+
+
+class AdminIntegrationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='123456')
+        cls.user = User.objects.create_user(username='user', email='user@example.com')
+        FavoriteProduct.objects.bulk_create(
+            FavoriteProduct(user=user, product_id=product_id)
+            for user in (cls.admin, cls.user) for product_id in (1, 2, 3)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def analyze(self):
+        """Atualiza as estatísticas do PostgreSQL utilizadas pela contagem estimada."""
+        with connection.cursor() as cursor:
+            for model in (User, FavoriteProduct):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def count_queries(self, queries):
+        return [query['sql'] for query in queries if 'COUNT(' in query['sql'].upper()]
+
+    def test_estimated_count_paginator(self):
+        """Acima do limite o total vem das estatísticas do PostgreSQL, sem COUNT(*)"""
+        self.analyze()
+
+        # tabelas pequenas utilizam a contagem exata
+        paginator = EstimatedCountPaginator(FavoriteProduct.objects.order_by('id'), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(6, paginator.count)
+        self.assertEqual(1, len(self.count_queries(queries)))
+
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 0):
+            paginator = EstimatedCountPaginator(FavoriteProduct.objects.order_by('id'), 2)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(6, paginator.count)
+            self.assertEqual([], self.count_queries(queries))
+
+            paginator = EstimatedCountPaginator(FavoriteProduct.objects.filter(user=self.user).order_by('id'), 2)
+            self.assertGreater(paginator.count, 0)
+
+    def test_favorite_products_changelist(self):
+        """A listagem de favoritos do admin não executa COUNT(*) e busca pelo cliente"""
+        self.analyze()
+
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/admin/customers/favoriteproduct/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([], self.count_queries(queries))
+        self.assertContains(response, 'user -&gt; 1')
+
+        response = self.client.get('/admin/customers/favoriteproduct/', {'q': 'USER@example.com'})
+        self.assertEqual(3, len(response.context['cl'].result_list))
+        self.assertEqual({self.user.pk}, {favorite.user_id for favorite in response.context['cl'].result_list})
+
+        response = self.client.get('/admin/customers/favoriteproduct/', {'q': 'use'})
+        self.assertEqual(0, len(response.context['cl'].result_list))
+
+    def test_favorite_products_change_form_without_user_list(self):
+        """O formulário do favorito não carrega a lista de todos os usuários"""
+        favorite = FavoriteProduct.objects.filter(user=self.user).first()
+
+        response = self.client.get(f'/admin/customers/favoriteproduct/{favorite.pk}/change/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+        self.assertNotContains(response, '<option value="%s"' % self.admin.pk)
+
+    def test_users_changelist(self):
+        """A listagem de usuários do admin não executa COUNT(*) nem o filtro por grupos"""
+        self.analyze()
+
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/admin/auth/user/', {'q': 'user'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([], self.count_queries(queries))
+        self.assertEqual(['user'], [user.username for user in response.context['cl'].result_list])
+        self.assertNotIn('groups', response.context['cl'].list_filter)
+
+
+class OutboxIntegrationTests(StubCatalogMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com')
+
+    def setUp(self):
+        cache.clear()
+        MemorySink.events.clear()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_favorite_changes_write_outbox_events(self):
+        """Inclusão e remoção de favoritos gravam eventos no outbox"""
+        response = self.client.post('/customers/favorite-products/', {'product_id': 1})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.delete(f"/customers/favorite-products/{response.json()['id']}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        events = list(OutboxEvent.objects.order_by('id'))
+        self.assertEqual([OutboxEvent.FAVORITE_ADDED, OutboxEvent.FAVORITE_REMOVED], [event.event_type for event in events])
+        for event in events:
+            self.assertEqual(self.user.pk, event.payload['user_id'])
+            self.assertEqual(1, event.payload['product_id'])
+
+    def test_favorite_not_created_without_outbox_event(self):
+        """Se o evento não puder ser gravado a inclusão do favorito é desfeita"""
+        with mock.patch('customers.views.record_favorite_event', side_effect=RuntimeError('outbox')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/customers/favorite-products/', {'product_id': 1})
+        self.assertFalse(FavoriteProduct.objects.exists())
+
+    def test_dispatch_outbox(self):
+        """O dispatcher entrega os eventos em lotes e os remove do outbox"""
+        for product_id in (1, 2, 3):
+            favorite = FavoriteProduct.objects.create(user=self.user, product_id=product_id)
+            record_favorite_event(OutboxEvent.FAVORITE_ADDED, favorite)
+
+        delivered = dispatch_outbox(sink=MemorySink(), batch_size=2, once=True)
+        self.assertEqual(3, delivered)
+        self.assertEqual([1, 2, 3], [message['data']['product_id'] for message in MemorySink.events])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_dispatch_outbox_retries(self):
+        """Falhas na entrega são tentadas novamente com espera crescente até o limite de tentativas"""
+        favorite = FavoriteProduct.objects.create(user=self.user, product_id=1)
+        event = record_favorite_event(OutboxEvent.FAVORITE_ADDED, favorite)
+        sink = mock.Mock()
+        sink.send.side_effect = requests.ConnectionError('indisponível')
+
+        with self.assertLogs('customers.outbox', 'WARNING'):
+            self.assertEqual((0, 1), dispatch_batch(sink, max_attempts=3, retry_base=10))
+        event.refresh_from_db()
+        self.assertEqual(1, event.attempts)
+        self.assertIn('indisponível', event.last_error)
+        self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=9))
+
+        # ainda aguardando a próxima tentativa
+        self.assertEqual((0, 0), dispatch_batch(sink, max_attempts=3))
+
+        OutboxEvent.objects.update(available_at=timezone.now(), attempts=2)
+        with self.assertLogs('customers.outbox', 'WARNING'):
+            self.assertEqual((0, 1), dispatch_batch(sink, max_attempts=3))
+        event.refresh_from_db()
+        self.assertIsNotNone(event.failed_at)
+        self.assertFalse(OutboxEvent.objects.pending().exists())
+
+    def test_dispatch_outbox_command_file_sink(self):
+        """O comando entrega os eventos ao destino configurado em OUTBOX['SINK']"""
+        favorite = FavoriteProduct.objects.create(user=self.user, product_id=1)
+        record_favorite_event(OutboxEvent.FAVORITE_ADDED, favorite)
+
+        with tempfile.TemporaryDirectory() as directory:
+            # o diretório do arquivo é criado na primeira entrega
+            path = os.path.join(directory, 'events', 'outbox.jsonl')
+            sink = {'BACKEND': 'customers.outbox.FileSink', 'OPTIONS': {'path': path}}
+            with override_settings(OUTBOX={'SINK': sink}):
+                out = StringIO()
+                call_command('dispatch_outbox', '--once', stdout=out)
+            self.assertIn('1 eventos entregues.', out.getvalue())
+
+            with open(path) as file:
+                messages = [json.loads(line) for line in file]
+        self.assertEqual([OutboxEvent.FAVORITE_ADDED], [message['type'] for message in messages])
+
+    def test_webhook_sink(self):
+        """O webhook envia o lote em um único POST"""
+        with mock.patch('customers.outbox.requests.post') as post:
+            WebhookSink(url='http://downstream/events').send([{'id': 1}, {'id': 2}])
+        post.assert_called_once_with('http://downstream/events', json=[{'id': 1}, {'id': 2}], headers={}, timeout=5)
+
+
+class ProductIndexTests(StubCatalogMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com')
+
+    def setUp(self):
+        cache.clear()
+        catalog.product_index.clear()
+        self.catalog.reset_requests()
+
+    def wait_refresh(self):
+        """Aguarda a atualização do índice iniciada em segundo plano."""
+        if catalog.product_index.thread is not None:
+            catalog.product_index.thread.join(10)
+
+    def authenticate(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_index_validates_ids_locally(self):
+        """O índice é carregado em segundo plano com uma única consulta e responde sem acessar a API"""
+        # sem índice carregado a validação não aguarda o download da listagem
+        self.assertIsNone(catalog.product_index.contains(1))
+        self.wait_refresh()
+
+        self.assertTrue(catalog.product_index.contains(1))
+        self.assertTrue(catalog.product_index.contains(20))
+        self.assertFalse(catalog.product_index.contains(0))
+        self.assertFalse(catalog.product_index.contains(-5))
+        # ids maiores que o maior conhecido podem ter sido criados após a atualização
+        self.assertIsNone(catalog.product_index.contains(21))
+        self.assertEqual(1, self.catalog.requests)
+
+    def test_index_gaps_rejected_locally(self):
+        """Ids ausentes dentro da faixa conhecida são recusados sem consultar a API"""
+        catalog.product_index.load(self.catalog.url, [1, 2, 5, 20])
+
+        self.assertTrue(catalog.product_exists(5))
+        self.assertFalse(catalog.product_exists(3))
+        self.assertEqual(0, self.catalog.requests)
+
+    def test_product_exists_fallback_for_new_ids(self):
+        """Ids maiores que o maior conhecido são consultados na API e os inexistentes lembrados"""
+        catalog.product_index.load(self.catalog.url, range(1, 11))
+
+        self.assertTrue(catalog.product_exists(15))
+        self.assertEqual(1, self.catalog.requests)
+
+        self.assertFalse(catalog.product_exists(999))
+        self.assertFalse(catalog.product_exists(999))
+        self.assertEqual(2, self.catalog.requests)
+
+    def test_index_refresh_failure(self):
+        """Com a listagem indisponível a validação consulta o produto e não tenta atualizar a cada chamada"""
+        with mock.patch.object(catalog, 'fetch_products', side_effect=requests.ConnectionError('indisponível')) as fetch:
+            with self.assertLogs('customers.catalog', 'WARNING'):
+                self.assertTrue(catalog.product_exists(1))
+                self.wait_refresh()
+            self.assertTrue(catalog.product_exists(2))
+        self.assertEqual(1, fetch.call_count)
+        self.assertEqual(2, self.catalog.requests)
+
+    def test_index_refreshed_when_expired(self):
+        """O índice é recarregado após o TTL"""
+        catalog.product_index.contains(1)
+        self.wait_refresh()
+        catalog.product_index.next_refresh = 0
+        catalog.product_index.contains(1)
+        self.wait_refresh()
+        self.assertEqual(2, self.catalog.requests)
+
+    def test_create_favorite_not_blocked_by_refresh(self):
+        """A inclusão de favorito não aguarda a atualização do índice"""
+        self.authenticate()
+        release = threading.Event()
+
+        def slow_fetch():
+            release.wait(10)
+            return []
+
+        with mock.patch.object(catalog, 'fetch_products', side_effect=slow_fetch):
+            response = self.client.post('/customers/favorite-products/', {'product_id': 1})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertTrue(catalog.product_index.thread.is_alive())
+            release.set()
+            self.wait_refresh()
+
+    def test_create_favorite_uses_index_data(self):
+        """A resposta da inclusão utiliza os dados do produto do índice, sem consultar a API"""
+        self.authenticate()
+        catalog.product_index.refresh()
+        self.catalog.reset_requests()
+
+        response = self.client.post('/customers/favorite-products/', {'product_id': 3})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.catalog.products[3]['title'], response.json()['title'])
+        self.assertEqual(0, self.catalog.requests)
+
+    def test_create_favorite_with_invalid_product(self):
+        """Produto inexistente é recusado pelo índice sem consultar o produto na API"""
+        self.authenticate()
+        catalog.product_index.refresh()
+        self.catalog.reset_requests()
+
+        response = self.client.post('/customers/favorite-products/', {'product_id': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(0, self.catalog.requests)
+        self.assertFalse(FavoriteProduct.objects.exists())
+
+
+class ProductThumbnailTests(StubCatalogMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        catalog.product_index.refresh()
+        self.catalog.reset_requests()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        settings = override_settings(THUMBNAILS={**thumbnails.DEFAULTS, 'CACHE_DIR': self.cache_dir})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_image(self, response):
+        from PIL import Image
+        return Image.open(io.BytesIO(b''.join(response.streaming_content)))
+
+    @skipIf(thumbnails.Image is None, "Pillow não instalado")
+    def test_thumbnail(self):
+        """A miniatura é gerada uma vez e servida do cache em disco nas próximas requisições"""
+        response = self.client.get('/customers/products/1/thumbnail/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('image/jpeg', response['Content-Type'])
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertLessEqual(max(self.get_image(response).size), 128)
+        # uma consulta ao produto e outra à imagem original
+        self.assertEqual(2, self.catalog.requests)
+
+        response = self.client.get('/customers/products/1/thumbnail/', {'size': 'medium'})
+        self.assertEqual(320, max(self.get_image(response).size))
+
+        self.catalog.reset_requests()
+        response = self.client.get('/customers/products/1/thumbnail/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(0, self.catalog.requests)
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+
+    def test_thumbnail_conditional_request(self):
+        """Com o ETag da miniatura a resposta é 304 sem corpo"""
+        response = self.client.get('/customers/products/2/thumbnail/')
+        etag = response['ETag']
+
+        response = self.client.get('/customers/products/2/thumbnail/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(b'', response.content)
+        self.assertEqual(etag, response['ETag'])
+
+    def test_thumbnail_invalid_requests(self):
+        """Produtos fora do catálogo e tamanhos inválidos são recusados sem baixar imagens"""
+        response = self.client.get('/customers/products/999/thumbnail/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get('/customers/products/1/thumbnail/', {'size': 'huge'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_thumbnail_image_unavailable(self):
+        """Falha ao baixar a imagem original retorna 502"""
+        product = {**self.catalog.products[3], 'image': f'{self.catalog.base_url}/images/missing.png'}
+        with mock.patch.dict(self.catalog.products, {3: product}):
+            response = self.client.get('/customers/products/3/thumbnail/')
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+    def test_thumbnail_cache_lru_eviction(self):
+        """Acima do limite os arquivos acessados há mais tempo são removidos"""
+        thumbnail_cache = thumbnails.ThumbnailCache(self.cache_dir, max_size=250)
+        for index, key in enumerate(['a', 'b']):
+            thumbnail_cache.store(key, 'jpg', b'x' * 100)[0].close()
+            os.utime(os.path.join(self.cache_dir, f'{key}.jpg'), (1000 + index, 1000 + index))
+
+        # o acesso ao primeiro arquivo o torna o mais recente
+        thumbnail_cache.open('a')[0].close()
+        thumbnail_cache.store('c', 'jpg', b'x' * 100)[0].close()
+
+        self.assertEqual(['a.jpg', 'c.jpg'], sorted(os.listdir(self.cache_dir)))
+        self.assertIsNone(thumbnail_cache.open('b'))
+
+    def test_thumbnail_cache_eviction_throttled(self):
+        """O diretório só é percorrido quando o tamanho estimado passa do limite, no máximo uma vez por intervalo"""
+        thumbnail_cache = thumbnails.ThumbnailCache(self.cache_dir, max_size=250, evict_interval=60, evict_target=0.5)
+        with mock.patch.object(thumbnails.os, 'scandir', wraps=os.scandir) as scandir:
+            for index, key in enumerate(['a', 'b', 'c']):
+                thumbnail_cache.store(key, 'jpg', b'x' * 100)[0].close()
+                os.utime(os.path.join(self.cache_dir, f'{key}.jpg'), (1000 + index, 1000 + index))
+            # apenas a primeira gravação percorre o diretório, a terceira ultrapassa o limite dentro do intervalo
+            self.assertEqual(1, scandir.call_count)
+            self.assertEqual(3, len(os.listdir(self.cache_dir)))
+
+            thumbnail_cache.evict_interval = 0
+            thumbnail_cache.store('d', 'jpg', b'x' * 100)[0].close()
+            self.assertEqual(2, scandir.call_count)
+
+        # a limpeza remove os arquivos mais antigos até metade do limite
+        self.assertEqual(['d.jpg'], os.listdir(self.cache_dir))
+        self.assertEqual(100, thumbnails.USAGE[self.cache_dir]['size'])
+
+    def test_favorites_image_points_to_thumbnail(self):
+        """A imagem dos favoritos aponta para o proxy de miniaturas"""
+        user = User.objects.create_user(username='user', email='user@example.com')
+        FavoriteProduct.objects.create(user=user, product_id=4)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = self.client.get('/customers/favorite-products/')
+        self.assertEqual('http://testserver/customers/products/4/thumbnail/', response.json()[0]['image'])
+
+
+# O registro de requisições lentas é desativado para não interferir na contagem de consultas
+@override_settings(REQUEST_PROFILING={'SLOW_REQUEST_THRESHOLD': None})
+class PerformanceBudgetTests(StubCatalogMixin, APITestCase):
+    """
+    Limites de consultas SQL, chamadas à API de produtos e latência por endpoint.
+    A quantidade de consultas não pode crescer com o tamanho da página (N+1).
+    """
+    QUERY_BUDGETS = {
+        'favorites-list': 2,
+        'favorites-sync': 2,
+        'favorites-create': 5,
+        'favorites-destroy': 4,
+        'customers-list': 2,
+        'customers-page': 2,
+    }
+    LATENCY_BUDGETS = {
+        'favorites-list-warm': 1.0,
+        'favorites-list-cold': 3.0,
+        'customers-page': 0.5,
+    }
+
+    catalog_products = 500
+    catalog_latency = 0.002
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', is_staff=True)
+        cls.user = User.objects.create_user(username='user', email='user@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        # índice de produtos já carregado, como em um processo em execução
+        catalog.product_index.refresh()
+        self.catalog.reset_requests()
+
+    def authenticate(self, user):
+        """Autenticação com token gerado diretamente, sem o custo do hash da senha."""
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def measure(self, method, url, data=None):
+        """Executa a requisição retornando a resposta, as consultas SQL, as chamadas à API e o tempo."""
+        self.catalog.reset_requests()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            elapsed = time.perf_counter() - start
+        # Os savepoints existem apenas porque cada teste é executado dentro de uma transação
+        queries = [query for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+        return response, len(queries), self.catalog.requests, elapsed
+
+    def create_favorites(self, user, count):
+        FavoriteProduct.objects.bulk_create(
+            FavoriteProduct(user=user, product_id=product_id) for product_id in range(1, count + 1)
+        )
+
+    def test_favorites_list_queries_constant(self):
+        """A listagem de favoritos executa a mesma quantidade de consultas para 1 ou 500 itens"""
+        other = User.objects.create_user(username='other', email='other@example.com')
+        self.create_favorites(self.user, 1)
+        self.create_favorites(other, 500)
+
+        self.authenticate(self.user)
+        response, small, _, _ = self.measure('get', '/customers/favorite-products/')
+        self.assertEqual(1, len(response.json()))
+
+        self.authenticate(other)
+        response, large, _, _ = self.measure('get', '/customers/favorite-products/')
+        self.assertEqual(500, len(response.json()))
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.QUERY_BUDGETS['favorites-list'])
+
+    def test_favorites_list_catalog_calls(self):
+        """A API de produtos é chamada uma vez por produto com o cache vazio e nenhuma vez com o cache preenchido"""
+        self.create_favorites(self.user, 50)
+        self.authenticate(self.user)
+
+        _, _, cold_calls, cold_elapsed = self.measure('get', '/customers/favorite-products/')
+        self.assertEqual(50, cold_calls)
+        self.assertLess(cold_elapsed, self.LATENCY_BUDGETS['favorites-list-cold'])
+
+        _, _, warm_calls, warm_elapsed = self.measure('get', '/customers/favorite-products/')
+        self.assertEqual(0, warm_calls)
+        self.assertLess(warm_elapsed, self.LATENCY_BUDGETS['favorites-list-warm'])
+
+        _, _, sparse_calls, _ = self.measure('get', '/customers/favorite-products/?fields=id,product_id')
+        self.assertEqual(0, sparse_calls)
+
+    def test_favorites_sync_queries_constant(self):
+        """A sincronização executa a mesma quantidade de consultas para qualquer quantidade de alterações"""
+        self.create_favorites(self.user, 1)
+        self.authenticate(self.user)
+        _, small, _, _ = self.measure('get', '/customers/favorite-products/sync/?fields=product_id')
+
+        FavoriteProduct.objects.bulk_create(
+            FavoriteProduct(user=self.user, product_id=product_id) for product_id in range(2, 301)
+        )
+        _, large, _, _ = self.measure('get', '/customers/favorite-products/sync/?fields=product_id')
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.QUERY_BUDGETS['favorites-sync'])
+
+    def test_favorites_create_and_destroy_budget(self):
+        """Inclusão e remoção de favoritos executam uma quantidade fixa de consultas"""
+        self.authenticate(self.user)
+
+        response, queries, calls, _ = self.measure('post', '/customers/favorite-products/', {'product_id': 1})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLessEqual(queries, self.QUERY_BUDGETS['favorites-create'])
+        self.assertLessEqual(calls, 1)
+
+        favorite_id = response.json()['id']
+        response, queries, calls, _ = self.measure('delete', f'/customers/favorite-products/{favorite_id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertLessEqual(queries, self.QUERY_BUDGETS['favorites-destroy'])
+        self.assertEqual(0, calls)
+
+    def test_customers_list_queries_constant(self):
+        """A listagem de clientes executa a mesma quantidade de consultas para 2 ou 200 clientes"""
+        self.authenticate(self.admin)
+        _, small, _, _ = self.measure('get', '/customers/')
+
+        User.objects.bulk_create(
+            User(username=f'budget{index}', email=f'budget{index}@example.com') for index in range(198)
+        )
+        response, large, calls, _ = self.measure('get', '/customers/')
+        self.assertEqual(200, len(response.json()))
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.QUERY_BUDGETS['customers-list'])
+        self.assertEqual(0, calls)
+
+    def test_customers_page_budget(self):
+        """A paginação por cursor não executa COUNT(*) e respeita o limite de latência"""
+        User.objects.bulk_create(
+            User(username=f'budget{index}', email=f'budget{index}@example.com') for index in range(300)
+        )
+        self.authenticate(self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get('/customers/', {'page_size': 100, 'search': 'budget'})
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(100, len(response.json()['results']))
+        self.assertLessEqual(len(queries), self.QUERY_BUDGETS['customers-page'])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        self.assertLess(elapsed, self.LATENCY_BUDGETS['customers-page'])
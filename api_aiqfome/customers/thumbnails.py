@@ -0,0 +1,215 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+try:
+    from PIL import Image
+except ImportError:  # sem o Pillow as imagens são armazenadas e servidas sem redimensionar
+    Image = None
+
+DEFAULTS = {
+    'CACHE_DIR': os.path.join(tempfile.gettempdir(), 'api_aiqfome', 'thumbnails'),
+    'MAX_CACHE_SIZE': 256 * 1024 * 1024,
+    'EVICT_INTERVAL': 60,
+    'EVICT_TARGET': 0.9,
+    'SIZES': {'small': 128, 'medium': 320},
+    'DEFAULT_SIZE': 'small',
+    'MAX_SOURCE_SIZE': 10 * 1024 * 1024,
+    'TIMEOUT': 5,
+    'QUALITY': 85,
+}
+
+CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+EXTENSIONS = {content_type: extension for extension, content_type in CONTENT_TYPES.items()}
+
+# Tamanho estimado de cada diretório de cache neste processo: o diretório só é percorrido
+# quando a estimativa ultrapassa o limite, não a cada miniatura gravada
+USAGE = {}
+USAGE_LOCK = threading.Lock()
+
+
+class ImageUnavailable(Exception):
+    """A imagem original não pôde ser obtida na API externa."""
+
+
+def thumbnail_options():
+    return {**DEFAULTS, **getattr(settings, 'THUMBNAILS', {})}
+
+
+def fetch_image(url, max_size, timeout):
+    """Baixa a imagem original, recusando respostas maiores que 'max_size' bytes."""
+    try:
+        with requests.get(url, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                raise ImageUnavailable(f"status {response.status_code}")
+            content = io.BytesIO()
+            for chunk in response.iter_content(64 * 1024):
+                content.write(chunk)
+                if content.tell() > max_size:
+                    raise ImageUnavailable("imagem maior que o limite")
+            return content.getvalue(), response.headers.get('Content-Type', '')
+    except requests.RequestException as error:
+        raise ImageUnavailable(str(error)) from error
+
+
+def make_thumbnail(data, size, quality):
+    """
+    Reduz a imagem para caber em um quadrado de 'size' pixels mantendo a proporção.
+    Imagens com transparência são gravadas em PNG e as demais em JPEG. Retorna (bytes, extensão).
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((size, size))
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ImageUnavailable(f"imagem inválida: {error}") from error
+
+    output = io.BytesIO()
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image.save(output, 'PNG', optimize=True)
+        return output.getvalue(), 'png'
+    image.convert('RGB').save(output, 'JPEG', quality=quality, optimize=True)
+    return output.getvalue(), 'jpg'
+
+
+class ThumbnailCache:
+    """
+    Miniaturas gravadas em disco, limitadas a 'max_size' bytes. A data de modificação dos
+    arquivos é atualizada a cada acesso e, quando o limite é ultrapassado, os arquivos
+    acessados há mais tempo são removidos (LRU).
+    """
+
+    def __init__(self, directory, max_size, evict_interval=0, evict_target=1.0):
+        self.directory = str(directory)
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+        self.evict_target = evict_target
+
+    def open(self, key):
+        """
+        Abre o arquivo da miniatura e atualiza a data de acesso. O arquivo aberto continua
+        legível mesmo se for removido em seguida pela limpeza de outro processo.
+        """
+        for extension in CONTENT_TYPES:
+            path = os.path.join(self.directory, f'{key}.{extension}')
+            try:
+                file = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            return file, CONTENT_TYPES[extension]
+        return None
+
+    def store(self, key, extension, content):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{key}.{extension}')
+        # Gravação atômica, requisições simultâneas nunca leem um arquivo incompleto
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(content)
+        os.replace(temporary, path)
+        file = open(path, 'rb')
+        if self.should_evict(len(content)):
+            self.evict()
+        return file, CONTENT_TYPES[extension]
+
+    def should_evict(self, added):
+        """
+        Soma 'added' ao tamanho estimado do diretório. A limpeza é executada quando a estimativa
+        passa de 'max_size' (ou ainda é desconhecida), no máximo uma vez a cada 'evict_interval'
+        segundos por processo, assim os workers não percorrem o diretório a cada miniatura gerada.
+        """
+        now = time.monotonic()
+        with USAGE_LOCK:
+            usage = USAGE.setdefault(self.directory, {'size': None, 'evicted_at': None})
+            if usage['size'] is not None:
+                usage['size'] += added
+                if usage['size'] <= self.max_size:
+                    return False
+            if usage['evicted_at'] is not None and now - usage['evicted_at'] < self.evict_interval:
+                return False
+            usage['evicted_at'] = now
+            return True
+
+    def evict(self):
+        """
+        Remove os arquivos acessados há mais tempo até o diretório caber em 'evict_target' do limite,
+        deixando folga para as próximas miniaturas antes de uma nova limpeza.
+        """
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_size:
+            target = self.max_size * self.evict_target
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+        with USAGE_LOCK:
+            USAGE.setdefault(self.directory, {'size': None, 'evicted_at': None})['size'] = total
+
+
+def get_cache():
+    options = thumbnail_options()
+    return ThumbnailCache(
+        options['CACHE_DIR'], options['MAX_CACHE_SIZE'],
+        evict_interval=options['EVICT_INTERVAL'], evict_target=options['EVICT_TARGET'],
+    )
+
+
+def thumbnail_key(product_id, image_url, size_name):
+    """
+    Chave da miniatura no cache, também utilizada como ETag. O hash da url da imagem
+    original gera uma nova miniatura quando a imagem do produto muda.
+    """
+    size = thumbnail_options()['SIZES'][size_name] if Image is not None else 'original'
+    digest = hashlib.sha1(f'{image_url}|{size}'.encode()).hexdigest()[:16]
+    return f'{product_id}-{digest}'
+
+
+def get_thumbnail(product_id, image_url, size_name):
+    """
+    Retorna (arquivo aberto, content type) da miniatura do produto, gerando-a na primeira requisição.
+    Levanta ImageUnavailable se a imagem original não puder ser obtida.
+    """
+    options = thumbnail_options()
+    cache = get_cache()
+    key = thumbnail_key(product_id, image_url, size_name)
+
+    found = cache.open(key)
+    if found is not None:
+        return found
+
+    data, content_type = fetch_image(image_url, options['MAX_SOURCE_SIZE'], options['TIMEOUT'])
+    if Image is not None:
+        data, extension = make_thumbnail(data, options['SIZES'][size_name], options['QUALITY'])
+    else:
+        extension = EXTENSIONS.get(content_type.split(';')[0].strip(), 'jpg')
+    return cache.store(key, extension, data)
@@ -1,8 +1,11 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CustomerViewSet, FavoriteProductViewSet
+from .views import CustomerViewSet, FavoriteProductViewSet, ProductThumbnailView
 
 router = DefaultRouter()
 router.register(r'favorite-products', FavoriteProductViewSet, basename="favorite-products")
 router.register(r'', CustomerViewSet, basename="user")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('products/<int:product_id>/thumbnail/', ProductThumbnailView.as_view(), name='product-thumbnail'),
+] + router.urls
@@ -1,23 +1,95 @@
+import requests
+from django.urls import reverse
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import viewsets, status, mixins
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from .models import FavoriteProduct
-from .serializers import CustomerSerializer, FavoriteProductSerializer
+from jobs.models import Job
+
+from .models import FavoriteProduct, OutboxEvent
+from . import catalog, exporter, tasks, thumbnails
+from .archive import deactivate_customer
+from .filters import CustomerFilter
+from .importer import detect_format, save_upload
+from .outbox import record_favorite_event
+from .pagination import CustomerCursorPagination
+from .serializers import (
+    CustomerSerializer,
+    CustomerImportJobSerializer,
+    FavoriteProductSerializer,
+    FavoriteProductSyncSerializer
+)
+from .sync import changes_since, encode_token, decode_token
+
+def import_job_data(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'report': job.result if job.status == Job.DONE else None,
+        'error': job.last_error,
+    }
+
+
+fields_parameter = openapi.Parameter(
+    'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Lista de campos separados por vírgula a serem retornados. Ex: 'id,product_id'"
+)
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminUser] 
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
     serializer_class = CustomerSerializer
-    http_method_names = ['get', 'post', 'put', 'delete']
+    http_method_names = ['get', 'post', 'put', 'patch', 'delete']
+    # A busca utiliza os índices trigram criados na migração 0003_customer_search_indexes
+    filter_backends = [SearchFilter, CustomerFilter]
+    search_fields = ['username', 'email', 'first_name', 'last_name']
+    pagination_class = CustomerCursorPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset
+
+        # Clientes desativados só são listados com '?is_active=false' (índice parcial auth_user_active_id_idx)
+        if self.action == 'list' and 'is_active' not in self.request.query_params:
+            queryset = queryset.filter(is_active=True)
+        return queryset
 
     @swagger_auto_schema(
-        operation_summary="Lista todos os clientes",
+        operation_summary="Lista os clientes ativos",
+        manual_parameters=[
+            fields_parameter,
+            openapi.Parameter(
+                'search', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="Busca por parte do username, e-mail, nome ou sobrenome"
+            ),
+            openapi.Parameter(
+                'email', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="E-mail exato, sem diferenciar maiúsculas e minúsculas"
+            ),
+            openapi.Parameter(
+                'is_active', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                description="Por padrão apenas os clientes ativos são listados"
+            ),
+            openapi.Parameter('is_staff', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                'page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description="Ativa a paginação por cursor com a quantidade de registros por página"
+            ),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
         responses={
             200: openapi.Response('', CustomerSerializer),
             401: 'Error: Unauthorized',
@@ -42,6 +114,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Obtem o registro de um cliente",
+        manual_parameters=[fields_parameter],
         responses={
             200: openapi.Response('', CustomerSerializer),
             401: 'Error: Unauthorized',
@@ -64,6 +137,19 @@ class CustomerViewSet(viewsets.ModelViewSet):
     )
     def update(self, request, *args, **kwargs):
         return super().update(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Atualiza parcialmente o registro de um cliente",
+        request_body=CustomerSerializer,
+        responses={
+            200: openapi.Response('', CustomerSerializer),
+            400: "Error: Bad Request",
+            401: 'Error: Unauthorized',
+            404: 'Error: Not Found',
+        },
+    )
+    def partial_update(self, request, *args, **kwargs):
+        return super().partial_update(request, *args, **kwargs)
   
     @swagger_auto_schema(
         operation_summary="Desativa o registro de um cliente",
@@ -74,11 +160,105 @@ class CustomerViewSet(viewsets.ModelViewSet):
         },
     )
     def destroy(self, request, *args, **kwargs):
-        user = self.get_object()
-        user.is_active = False
-        user.save()
+        deactivate_customer(self.get_object())
         return Response({"detail": "Usuário desativado."}, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(
+        operation_summary="Envia um arquivo CSV ou JSONL para a importação de clientes em lote",
+        operation_description=(
+            "O arquivo é importado em segundo plano pela fila de jobs. "
+            "Acompanhe o resultado em /customers/import/{job_id}/."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                description="Arquivo com as colunas username, email, password, first_name, last_name e is_staff"
+            ),
+            openapi.Parameter(
+                'file_format', openapi.IN_FORM, type=openapi.TYPE_STRING, enum=['csv', 'jsonl'],
+                description="Formato do arquivo. Se omitido é identificado pela extensão"
+            ),
+        ],
+        responses={
+            202: CustomerImportJobSerializer,
+            400: "Error: Bad Request",
+            401: 'Error: Unauthorized',
+            403: 'Error: Forbidden'
+        },
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_customers(self, request, *args, **kwargs):
+        file = request.FILES.get('file')
+        if file is None:
+            return Response({"file": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or detect_format(file.name)
+        if file_format not in ('csv', 'jsonl'):
+            return Response({"file_format": ["Formato inválido."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Os hashes das senhas são gerados pelo worker da fila, fora do processo web
+        try:
+            path = save_upload(file, file_format)
+        except UnicodeDecodeError:
+            return Response({"file": ["O arquivo deve estar codificado em UTF-8."]}, status=status.HTTP_400_BAD_REQUEST)
+        job = tasks.import_customers.enqueue(path=path, file_format=file_format)
+
+        url = reverse('user-import-status', args=[job.id])
+        return Response(
+            CustomerImportJobSerializer(import_job_data(job)).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': request.build_absolute_uri(url)},
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Retorna a situação e o resultado de uma importação de clientes",
+        responses={
+            200: CustomerImportJobSerializer,
+            401: 'Error: Unauthorized',
+            403: 'Error: Forbidden',
+            404: 'Error: Not Found',
+        },
+    )
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>\d+)', url_name='import-status')
+    def import_status(self, request, job_id, *args, **kwargs):
+        job = Job.objects.filter(pk=job_id, task=tasks.import_customers.name).first()
+        if job is None:
+            return Response({"detail": "Importação não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(CustomerImportJobSerializer(import_job_data(job)).data)
+
+    @swagger_auto_schema(
+        operation_summary="Exporta todos os clientes em CSV ou JSONL",
+        manual_parameters=[
+            openapi.Parameter(
+                'file_format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['csv', 'jsonl'],
+                description="Formato do arquivo (padrão: csv)"
+            ),
+            openapi.Parameter(
+                'favorites', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                description="Inclui os identificadores dos produtos favoritos de cada cliente"
+            ),
+        ],
+        responses={
+            200: 'Arquivo com os clientes',
+            400: "Error: Bad Request",
+            401: 'Error: Unauthorized',
+            403: 'Error: Forbidden'
+        },
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in exporter.FORMATS:
+            return Response({"file_format": ["Formato inválido."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        include_favorites = request.query_params.get('favorites', '').lower() in ('1', 'true')
+        response = StreamingHttpResponse(
+            exporter.export(file_format, include_favorites),
+            content_type=exporter.CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="customers.{file_format}"'
+        return response
+
 
 class FavoriteProductViewSet(
     mixins.CreateModelMixin,
@@ -93,7 +273,18 @@ class FavoriteProductViewSet(
         if getattr(self, 'swagger_fake_view', False):
             return FavoriteProduct.objects.none() 
             
-        return FavoriteProduct.objects.filter(user=self.request.user)
+        return FavoriteProduct.objects.active().filter(user=self.request.user)
+
+    # Os eventos do outbox são gravados na mesma transação da alteração do favorito
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            favorite = serializer.save()
+            record_favorite_event(OutboxEvent.FAVORITE_ADDED, favorite)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.mark_deleted()
+            record_favorite_event(OutboxEvent.FAVORITE_REMOVED, instance)
 
     @swagger_auto_schema(
         request_body=FavoriteProductSerializer,
@@ -109,6 +300,7 @@ class FavoriteProductViewSet(
 
     @swagger_auto_schema(
         operation_summary="Lista os produtos favoritos",
+        manual_parameters=[fields_parameter],
         responses={
             200: FavoriteProductSerializer(many=True),
             401: 'Error: Unauthorized'
@@ -126,4 +318,108 @@ class FavoriteProductViewSet(
         }
     )
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Sincroniza os produtos favoritos alterados desde o último token",
+        manual_parameters=[
+            openapi.Parameter(
+                'since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description=(
+                    "Token retornado pela sincronização anterior. Sem ele, ou com um token mais antigo "
+                    "que a retenção das remoções, a lista completa é retornada (full=true)."
+                )
+            ),
+            fields_parameter,
+        ],
+        responses={
+            200: FavoriteProductSyncSerializer,
+            400: 'Error: Bad Request',
+            401: 'Error: Unauthorized'
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def sync(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        queryset = FavoriteProduct.objects.filter(user=request.user)
+        # O token é o horário da sincronização, a próxima relê a janela de sobreposição anterior a ele
+        token = encode_token(timezone.now())
+
+        changes = None
+        if since:
+            try:
+                changes = changes_since(queryset, decode_token(since))
+            except (ValueError, OverflowError):
+                return Response({"detail": "Token de sincronização inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sem token, ou com token anterior à retenção dos tombstones, a lista completa é enviada
+        full = changes is None
+        if full:
+            changes = queryset.active()
+
+        changes = list(changes.order_by('changed_at', 'id'))
+        added = [favorite for favorite in changes if favorite.deleted_at is None]
+        removed = [favorite.product_id for favorite in changes if favorite.deleted_at is not None]
+
+        return Response({
+            'token': token,
+            'full': full,
+            'added': self.get_serializer(added, many=True).data,
+            'removed': removed,
+        })
+
+
+class ProductThumbnailView(APIView):
+    """
+    Miniatura da imagem de um produto do catálogo. A imagem original é baixada uma única vez
+    e a miniatura é servida do cache em disco, com suporte a requisições condicionais (ETag).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    # Imagens de produtos não mudam com frequência, novas imagens geram um novo ETag
+    cache_control = 'public, max-age=86400'
+
+    @swagger_auto_schema(
+        operation_summary="Retorna a miniatura da imagem do produto",
+        manual_parameters=[
+            openapi.Parameter(
+                'size', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=list(thumbnails.DEFAULTS['SIZES']),
+                description="Tamanho da miniatura"
+            ),
+        ],
+        responses={
+            200: 'Imagem (image/jpeg ou image/png)',
+            304: 'Not Modified',
+            400: 'Error: Bad Request',
+            404: 'Error: Not Found',
+            502: 'Error: Bad Gateway',
+        }
+    )
+    def get(self, request, product_id):
+        options = thumbnails.thumbnail_options()
+        size = request.query_params.get('size', options['DEFAULT_SIZE'])
+        if size not in options['SIZES']:
+            return Response({"detail": "Tamanho inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Somente imagens de produtos do catálogo são servidas, a url da imagem nunca vem do cliente
+        try:
+            product = catalog.get_product(product_id) if catalog.product_exists(product_id) else None
+        except (ValueError, requests.RequestException):
+            product = None
+        image_url = (product or {}).get('image')
+        if not image_url:
+            return Response({"detail": "Produto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{thumbnails.thumbnail_key(product_id, image_url, size)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            try:
+                file, content_type = thumbnails.get_thumbnail(product_id, image_url, size)
+            except thumbnails.ImageUnavailable:
+                return Response({"detail": "Imagem indisponível."}, status=status.HTTP_502_BAD_GATEWAY)
+            response = FileResponse(file, content_type=content_type)
+
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = self.cache_control
+        return response
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Job, Schedule
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'run_at', 'attempts', 'started_at', 'heartbeat_at', 'finished_at', 'worker']
+    list_filter = ['status', 'task']
+    sortable_by = ['id', 'run_at']
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'next_run_at']
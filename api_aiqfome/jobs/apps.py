@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Registra as tarefas definidas nos módulos 'tasks.py' de cada app e as métricas da fila
+        autodiscover_modules('tasks')
+        from . import metrics  # noqa: F401
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Executa os jobs de background da fila e enfileira as tarefas periódicas de JOBS['SCHEDULE']"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help="Encerra quando não houver mais jobs disponíveis")
+        parser.add_argument('--max-jobs', type=int, help="Quantidade máxima de jobs nesta execução")
+        parser.add_argument('--name', help="Nome do worker (padrão: host:pid)")
+
+    def handle(self, *args, **options):
+        worker = Worker(name=options['name'])
+        self.stdout.write(f"Worker {worker.name} iniciado.")
+        executed = worker.run(burst=options['burst'], max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f"{executed} jobs executados."))
@@ -0,0 +1,27 @@
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from monitoring.metrics import REGISTRY, Gauge
+
+from .models import Job
+
+
+def collect_jobs():
+    rows = Job.objects.values_list('task', 'status').annotate(total=Count('id')).order_by()
+    return {(task, status): total for task, status, total in rows}
+
+
+def collect_queue_age():
+    rows = Job.objects.ready().values_list('task').annotate(oldest=Min('run_at')).order_by()
+    now = timezone.now()
+    return {(task,): round((now - oldest).total_seconds(), 3) for task, oldest in rows}
+
+
+# Calculadas a partir da tabela de jobs, refletem todos os workers e não apenas o processo atual
+JOBS = REGISTRY.register(Gauge(
+    'jobs', 'Quantidade de jobs por tarefa e status.', labels=('task', 'status'), collect=collect_jobs,
+))
+JOBS_QUEUE_AGE = REGISTRY.register(Gauge(
+    'jobs_queue_oldest_seconds', 'Tempo de espera do job mais antigo pronto para execução.',
+    labels=('task',), collect=collect_queue_age,
+))
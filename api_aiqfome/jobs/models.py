@@ -0,0 +1,56 @@
+from django.db import models
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+    def ready(self):
+        """Jobs na fila cuja data de execução já chegou."""
+        return self.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Em execução'),
+        (DONE, 'Concluído'),
+        (FAILED, 'Falhou'),
+    ]
+
+    task = models.CharField(max_length=200, help_text="Nome da tarefa registrada com @task")
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Data a partir da qual o job pode ser executado")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Último sinal do worker que executa o job")
+    worker = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            models.Index(fields=['task'], condition=models.Q(status='running'), name='job_running_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class Schedule(models.Model):
+    """Próxima execução de cada tarefa periódica definida em JOBS['SCHEDULE']."""
+    name = models.CharField(max_length=200, unique=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
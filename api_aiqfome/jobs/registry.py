@@ -0,0 +1,45 @@
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+
+class Task:
+    """Função registrada como tarefa de background. Chamar a tarefa executa a função diretamente."""
+
+    def __init__(self, func, name, concurrency=None, max_attempts=3, retry_delay=10.0):
+        self.func = func
+        self.name = name
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, run_at=None, **kwargs):
+        """Coloca a tarefa na fila. Os argumentos precisam ser serializáveis em JSON."""
+        return Job.objects.create(
+            task=self.name,
+            kwargs=kwargs,
+            run_at=run_at or timezone.now(),
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(name=None, concurrency=None, max_attempts=3, retry_delay=10.0):
+    """
+    Registra a função como tarefa. 'concurrency' limita a quantidade de jobs da tarefa
+    executando ao mesmo tempo em todos os workers. Falhas são tentadas novamente até
+    'max_attempts' vezes, com espera de 'retry_delay' segundos dobrando a cada tentativa.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = Task(func, task_name, concurrency, max_attempts, retry_delay)
+        return TASKS[task_name]
+    return decorator
+
+
+def get_task(name):
+    return TASKS[name]
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import task
+
+
+@task('jobs.cleanup', concurrency=1)
+def cleanup(keep_days=None):
+    """Remove os jobs finalizados há mais de JOBS['KEEP_FINISHED_DAYS'] dias."""
+    if keep_days is None:
+        keep_days = getattr(settings, 'JOBS', {}).get('KEEP_FINISHED_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,233 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job, Schedule
+from jobs.registry import TASKS, task
+from jobs.worker import Worker, enqueue_periodic, requeue_stale
+from monitoring import metrics
+
+calls = []
+
+
+@task('tests.record')
+def record(value=None):
+    calls.append(value)
+    return value
+
+
+@task('tests.limited', concurrency=1)
+def limited():
+    return 'limited'
+
+
+@task('tests.flaky', max_attempts=2, retry_delay=30)
+def flaky():
+    raise RuntimeError('falhou')
+
+
+@task('tests.slow')
+def slow(seconds=0.3):
+    time.sleep(seconds)
+
+
+@task('tests.requeued')
+def requeued():
+    # simula o job devolvido para a fila por outro worker durante a execução
+    Job.objects.filter(task='tests.requeued').update(status=Job.QUEUED, worker='')
+
+
+@override_settings(JOBS={'SCHEDULE': {}})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(name='test', poll_interval=0)
+
+    def test_enqueue_and_run(self):
+        """O worker executa os jobs da fila em ordem e guarda o resultado"""
+        first = record.enqueue(value=1)
+        second = record.enqueue(value=2)
+        record.enqueue(value=3, run_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(2, self.worker.run(burst=True))
+        self.assertEqual([1, 2], calls)
+
+        first.refresh_from_db()
+        self.assertEqual(Job.DONE, first.status)
+        self.assertEqual(1, first.result)
+        self.assertEqual(1, first.attempts)
+        self.assertEqual('test', first.worker)
+        self.assertEqual(Job.DONE, Job.objects.get(pk=second.pk).status)
+        self.assertEqual(1, Job.objects.filter(status=Job.QUEUED).count())
+
+    def test_failed_job_retried_with_backoff(self):
+        """Jobs com erro voltam para a fila com espera até o limite de tentativas"""
+        job = flaky.enqueue()
+
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.assertTrue(self.worker.run_once())
+        job.refresh_from_db()
+        self.assertEqual(Job.QUEUED, job.status)
+        self.assertIn('falhou', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=29))
+        self.assertFalse(self.worker.run_once())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(Job.FAILED, job.status)
+        self.assertEqual(2, job.attempts)
+
+    def test_unknown_task_fails(self):
+        """Jobs de tarefas não registradas falham sem novas tentativas"""
+        job = Job.objects.create(task='tests.unknown')
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(Job.FAILED, job.status)
+
+    def test_concurrency_limit(self):
+        """Uma tarefa com limite de concorrência não é reservada enquanto o limite estiver ocupado"""
+        Job.objects.create(task='tests.limited', status=Job.RUNNING, started_at=timezone.now())
+        waiting = limited.enqueue()
+        other = record.enqueue(value='other')
+
+        job = self.worker.claim()
+        self.assertEqual(other.pk, job.pk)
+        self.assertIsNone(self.worker.claim())
+
+        Job.objects.filter(task='tests.limited', status=Job.RUNNING).update(status=Job.DONE)
+        self.assertEqual(waiting.pk, self.worker.claim().pk)
+
+    def test_requeue_stale_jobs(self):
+        """Jobs sem sinal do worker (worker interrompido) voltam para a fila, os demais continuam em execução"""
+        old = timezone.now() - timedelta(hours=2)
+        stale = Job.objects.create(task='tests.record', status=Job.RUNNING, attempts=1, started_at=old, heartbeat_at=old)
+        long_running = Job.objects.create(
+            task='tests.record', status=Job.RUNNING, attempts=1, started_at=old, heartbeat_at=timezone.now(),
+        )
+
+        self.assertEqual(1, requeue_stale(300))
+        stale.refresh_from_db()
+        self.assertEqual(Job.QUEUED, stale.status)
+        self.assertEqual(Job.RUNNING, Job.objects.get(pk=long_running.pk).status)
+
+    def test_requeue_stale_jobs_attempts(self):
+        """Uma execução interrompida conta como tentativa, esgotadas as tentativas o job falha"""
+        old = timezone.now() - timedelta(hours=2)
+        job = Job.objects.create(task='tests.record', status=Job.RUNNING, attempts=3, max_attempts=3, heartbeat_at=old)
+
+        self.assertEqual(1, requeue_stale(300))
+        job.refresh_from_db()
+        self.assertEqual(Job.FAILED, job.status)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(self.worker.run_once())
+
+    def test_requeued_job_not_overwritten(self):
+        """O resultado não sobrescreve um job devolvido para a fila durante a execução"""
+        job = requeued.enqueue()
+
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            self.assertTrue(self.worker.run_once())
+        job.refresh_from_db()
+        self.assertEqual(Job.QUEUED, job.status)
+        self.assertIsNone(job.finished_at)
+
+    def test_maintenance_throttled(self):
+        """As tarefas periódicas e os jobs interrompidos são verificados uma vez por intervalo"""
+        for value in range(3):
+            record.enqueue(value=value)
+
+        worker = Worker(name='test', poll_interval=60)
+        with mock.patch('jobs.worker.enqueue_periodic') as enqueue, mock.patch('jobs.worker.requeue_stale') as requeue:
+            self.assertEqual(3, worker.run(burst=True))
+        self.assertEqual(1, enqueue.call_count)
+        self.assertEqual(1, requeue.call_count)
+
+    def test_periodic_tasks(self):
+        """As tarefas periódicas são enfileiradas uma vez por intervalo"""
+        schedule = {'record-every-minute': {'task': 'tests.record', 'interval': 60, 'kwargs': {'value': 'periodic'}}}
+
+        self.assertEqual(1, enqueue_periodic(schedule))
+        self.assertEqual(0, enqueue_periodic(schedule))
+        self.assertEqual({'value': 'periodic'}, Job.objects.get(task='tests.record').kwargs)
+
+        Schedule.objects.update(next_run_at=timezone.now())
+        self.assertEqual(1, enqueue_periodic(schedule))
+        self.assertEqual(2, Job.objects.filter(task='tests.record').count())
+
+    def test_registered_tasks(self):
+        """As tarefas dos apps são registradas automaticamente"""
+        for name in ('customers.refresh_catalog', 'customers.archive_inactive_favorites', 'customers.prune_tombstones', 'jobs.cleanup'):
+            self.assertIn(name, TASKS)
+
+    def test_cleanup_task(self):
+        """A limpeza remove os jobs finalizados antigos"""
+        old = timezone.now() - timedelta(days=30)
+        Job.objects.create(task='tests.record', status=Job.DONE, finished_at=old)
+        Job.objects.create(task='tests.record', status=Job.DONE, finished_at=timezone.now())
+        Job.objects.create(task='tests.record')
+
+        self.assertEqual(1, TASKS['jobs.cleanup']())
+        self.assertEqual(2, Job.objects.count())
+
+    def test_job_metrics(self):
+        """As métricas da fila são calculadas a partir da tabela de jobs"""
+        record.enqueue(value=1)
+        Job.objects.create(task='tests.record', status=Job.FAILED)
+
+        output = metrics.REGISTRY.render()
+        self.assertIn('jobs{task="tests.record",status="queued"} 1', output)
+        self.assertIn('jobs{task="tests.record",status="failed"} 1', output)
+        self.assertIn('jobs_queue_oldest_seconds{task="tests.record"}', output)
+
+    def test_run_jobs_command(self):
+        """O comando executa os jobs disponíveis e encerra com --burst"""
+        record.enqueue(value='command')
+        out = StringIO()
+        call_command('run_jobs', '--burst', stdout=out)
+        self.assertIn('1 jobs executados.', out.getvalue())
+        self.assertEqual(['command'], calls)
+
+
+@override_settings(JOBS={'SCHEDULE': {}})
+class JobQueueLockingTests(TransactionTestCase):
+    def test_locked_job_skipped(self):
+        """Um job bloqueado por outro worker é ignorado (SKIP LOCKED)"""
+        locked = record.enqueue(value='locked')
+        free = record.enqueue(value='free')
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                Job.objects.select_for_update().get(pk=locked.pk)
+                acquired.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(acquired.wait(10))
+            job = Worker(name='test').claim()
+            self.assertEqual(free.pk, job.pk)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_heartbeat(self):
+        """O worker atualiza o sinal do job durante a execução"""
+        job = slow.enqueue(seconds=0.3)
+
+        self.assertTrue(Worker(name='test', heartbeat_interval=0.05).run_once())
+        job.refresh_from_db()
+        self.assertEqual(Job.DONE, job.status)
+        self.assertGreater(job.heartbeat_at, job.started_at)
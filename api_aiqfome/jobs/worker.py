@@ -0,0 +1,242 @@
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job, Schedule
+from .registry import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+def jobs_options():
+    return getattr(settings, 'JOBS', {})
+
+
+def advisory_lock_key(name):
+    return zlib.crc32(f'jobs:{name}'.encode())
+
+
+def enqueue_periodic(schedule=None):
+    """
+    Coloca na fila as tarefas periódicas cuja próxima execução já chegou.
+    As linhas de Schedule são bloqueadas com SKIP LOCKED, então apenas um worker
+    enfileira cada execução. Retorna a quantidade de jobs criados.
+    """
+    schedule = jobs_options().get('SCHEDULE', {}) if schedule is None else schedule
+    if not schedule:
+        return 0
+
+    existing = set(Schedule.objects.filter(name__in=schedule).values_list('name', flat=True))
+    Schedule.objects.bulk_create(
+        [Schedule(name=name) for name in schedule if name not in existing],
+        ignore_conflicts=True,
+    )
+
+    created = 0
+    now = timezone.now()
+    with transaction.atomic():
+        due = Schedule.objects.filter(name__in=schedule, next_run_at__lte=now).select_for_update(skip_locked=True)
+        for entry in due:
+            options = schedule[entry.name]
+            TASKS[options['task']].enqueue(**options.get('kwargs', {}))
+            entry.next_run_at = now + timedelta(seconds=options['interval'])
+            entry.save(update_fields=['next_run_at'])
+            created += 1
+    return created
+
+
+def requeue_stale(stale_after):
+    """
+    Trata os jobs cujo worker não envia sinal há mais de 'stale_after' segundos (worker interrompido).
+    A execução interrompida conta como tentativa: o job volta para a fila ou, se as tentativas
+    se esgotaram, é marcado como falho. Retorna a quantidade de jobs tratados.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    error = 'Worker interrompido durante a execução'
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(status=Job.FAILED, finished_at=now, last_error=error)
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(status=Job.QUEUED, run_at=now, last_error=error)
+    return failed + requeued
+
+
+class Heartbeat:
+    """
+    Atualiza 'heartbeat_at' do job a cada 'interval' segundos enquanto ele é executado.
+    Roda em uma thread com conexão própria, então o sinal continua mesmo durante tarefas longas.
+    """
+
+    def __init__(self, job, worker, interval):
+        self.job = job
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'heartbeat-{job.pk}', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, status=Job.RUNNING, worker=self.worker).update(
+                        heartbeat_at=timezone.now(),
+                    )
+                except DatabaseError:
+                    logger.warning("Falha ao atualizar o sinal do job %s", self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+
+class Worker:
+    """
+    Executa os jobs da fila, um por vez. Vários workers podem rodar em paralelo:
+    cada job é reservado com SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    def __init__(self, name=None, poll_interval=None, stale_after=None, heartbeat_interval=None):
+        options = jobs_options()
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = options.get('POLL_INTERVAL', 1.0) if poll_interval is None else poll_interval
+        self.stale_after = options.get('STALE_AFTER', 300) if stale_after is None else stale_after
+        self.heartbeat_interval = (
+            options.get('HEARTBEAT_INTERVAL', 30) if heartbeat_interval is None else heartbeat_interval
+        )
+        self.last_maintenance = None
+
+    def saturated_tasks(self):
+        """Tarefas que já atingiram o limite de execuções simultâneas."""
+        limited = {name: task.concurrency for name, task in TASKS.items() if task.concurrency}
+        if not limited:
+            return set()
+        running = dict(
+            Job.objects.filter(status=Job.RUNNING, task__in=limited)
+            .values_list('task').annotate(total=Count('id')).order_by()
+        )
+        return {name for name, limit in limited.items() if running.get(name, 0) >= limit}
+
+    def claim(self):
+        """Reserva o próximo job disponível, respeitando os limites de concorrência das tarefas."""
+        excluded = set()
+        while True:
+            with transaction.atomic():
+                job = (
+                    Job.objects.ready()
+                    .exclude(task__in=excluded | self.saturated_tasks())
+                    .select_for_update(skip_locked=True)
+                    .order_by('run_at', 'id')
+                    .first()
+                )
+                if job is None:
+                    return None
+
+                task = TASKS.get(job.task)
+                if task is not None and task.concurrency:
+                    # O lock por tarefa serializa apenas as reservas de tarefas com limite,
+                    # garantindo que a contagem de jobs em execução esteja atualizada
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [advisory_lock_key(job.task)])
+                    running = Job.objects.filter(status=Job.RUNNING, task=job.task).count()
+                    if running >= task.concurrency:
+                        excluded.add(job.task)
+                        continue
+
+                job.status = Job.RUNNING
+                job.attempts += 1
+                job.started_at = job.heartbeat_at = timezone.now()
+                job.worker = self.name
+                job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at', 'worker'])
+                return job
+
+    def finish(self, job, fields):
+        """
+        Grava o resultado do job apenas se ele ainda pertence a esta execução. Um job
+        devolvido para a fila por falta de sinal não é sobrescrito.
+        """
+        values = {name: getattr(job, name) for name in fields}
+        updated = Job.objects.filter(
+            pk=job.pk, status=Job.RUNNING, worker=self.name, attempts=job.attempts,
+        ).update(**values)
+        if not updated:
+            logger.warning("Job %s (%s) foi devolvido para a fila durante a execução", job.pk, job.task)
+        return bool(updated)
+
+    def execute(self, job):
+        task = TASKS.get(job.task)
+        start = time.perf_counter()
+        try:
+            if task is None:
+                raise LookupError(f"Tarefa '{job.task}' não registrada")
+            with Heartbeat(job, self.name, self.heartbeat_interval):
+                result = task(**job.kwargs)
+        except Exception as error:
+            logger.exception("Job %s (%s) falhou", job.pk, job.task)
+            job.last_error = f'{type(error).__name__}: {error}'[:2000]
+            if task is not None and job.attempts < job.max_attempts:
+                job.status = Job.QUEUED
+                job.run_at = timezone.now() + timedelta(seconds=task.retry_delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = Job.FAILED
+                job.finished_at = timezone.now()
+            self.finish(job, ['status', 'run_at', 'finished_at', 'last_error'])
+            return False
+
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+        job.result = result
+        if not self.finish(job, ['status', 'finished_at', 'result']):
+            return False
+        logger.info("Job %s (%s) concluído em %.3fs", job.pk, job.task, time.perf_counter() - start)
+        return True
+
+    def maintenance(self):
+        """Enfileira as tarefas periódicas e trata os jobs interrompidos, no máximo uma vez por intervalo."""
+        now = time.monotonic()
+        if self.last_maintenance is not None and now - self.last_maintenance < self.poll_interval:
+            return
+        self.last_maintenance = now
+        enqueue_periodic()
+        requeue_stale(self.stale_after)
+
+    def run_once(self):
+        """Executa um job, se houver algum disponível. Retorna False quando a fila está vazia."""
+        job = self.claim()
+        if job is None:
+            return False
+        self.execute(job)
+        return True
+
+    def run(self, burst=False, max_jobs=None):
+        """
+        Processa a fila até ser interrompido. Com 'burst' encerra quando não houver mais jobs disponíveis.
+        Retorna a quantidade de jobs executados.
+        """
+        executed = 0
+        while max_jobs is None or executed < max_jobs:
+            self.maintenance()
+            if self.run_once():
+                executed += 1
+            elif burst:
+                break
+            else:
+                # Fila vazia: descarta conexões com erro ou expiradas (CONN_MAX_AGE) antes de aguardar
+                close_old_connections()
+                time.sleep(self.poll_interval)
+        return executed
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'created_at', 'kind', 'method', 'path', 'status_code',
+        'duration_ms', 'db_count', 'catalog_count', 'user',
+    ]
+    list_filter = ['kind', 'view']
+    list_select_related = ['user']
+    search_fields = ['path']
+    sortable_by = ['id', 'created_at', 'duration_ms', 'db_count', 'catalog_count']
+    readonly_fields = [field.name for field in RequestProfile._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
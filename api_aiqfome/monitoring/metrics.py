@@ -0,0 +1,191 @@
+import threading
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metric:
+    """Métrica com rótulos mantida em memória no processo e exportada no formato texto do Prometheus."""
+    type = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labels, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.type}']
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{self._format_labels(key)} {value}']
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+            state['count'] += 1
+            state['sum'] += value
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels))
+
+    def _render_value(self, key, value):
+        lines = [
+            f'{self.name}_bucket{self._format_labels(key, ("le", str(bound)))} {count}'
+            for bound, count in zip(self.buckets, value['buckets'])
+        ]
+        lines.append(f'{self.name}_bucket{self._format_labels(key, ("le", "+Inf"))} {value["count"]}')
+        lines.append(f'{self.name}_count{self._format_labels(key)} {value["count"]}')
+        lines.append(f'{self.name}_sum{self._format_labels(key)} {value["sum"]}')
+        return lines
+
+
+class Gauge(Metric):
+    """Valor calculado no momento da coleta pela função 'collect', que retorna {(rótulos,): valor}."""
+    type = 'gauge'
+
+    def __init__(self, name, description, labels=(), collect=None):
+        super().__init__(name, description, labels)
+        self.collect = collect
+
+    def render(self):
+        with self.lock:
+            self.values = dict(self.collect()) if self.collect else self.values
+        return super().render()
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{self._format_labels(key)} {value}']
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Tempo de resposta das requisições por endpoint.',
+    labels=('method', 'view', 'status'),
+))
+DB_QUERIES = REGISTRY.register(Histogram(
+    'db_queries_per_request', 'Quantidade de consultas SQL por requisição.',
+    labels=('view',), buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+))
+DB_DURATION = REGISTRY.register(Counter(
+    'db_query_duration_seconds_total', 'Tempo total gasto em consultas SQL.', labels=('view',),
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'cache_requests_total', 'Consultas ao cache por tipo de chave e resultado (hit/miss).', labels=('key', 'result'),
+))
+CATALOG_DURATION = REGISTRY.register(Histogram(
+    'catalog_request_duration_seconds', 'Tempo das chamadas à API externa de produtos.', labels=('status',),
+))
+CATALOG_ERRORS = REGISTRY.register(Counter(
+    'catalog_errors_total', 'Falhas nas chamadas à API externa de produtos.', labels=('reason',),
+))
+
+
+class RequestMetrics:
+    """Totais acumulados durante uma requisição, usados no cabeçalho Server-Timing."""
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.catalog_count = 0
+        self.catalog_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+current_request = ContextVar('current_request', default=None)
+
+
+def record_query(duration):
+    request_metrics = current_request.get()
+    if request_metrics is not None:
+        request_metrics.db_count += 1
+        request_metrics.db_time += duration
+
+
+def record_cache(key, hit):
+    CACHE_REQUESTS.inc(key=key, result='hit' if hit else 'miss')
+    request_metrics = current_request.get()
+    if request_metrics is not None:
+        if hit:
+            request_metrics.cache_hits += 1
+        else:
+            request_metrics.cache_misses += 1
+
+
+def record_catalog_call(duration, status=None, error=None):
+    CATALOG_DURATION.observe(duration, status=status if status is not None else 'error')
+    if error:
+        CATALOG_ERRORS.inc(reason=error)
+    request_metrics = current_request.get()
+    if request_metrics is not None:
+        request_metrics.catalog_count += 1
+        request_metrics.catalog_time += duration
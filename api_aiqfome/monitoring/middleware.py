@@ -0,0 +1,87 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+from .models import RequestProfile
+from .profiling import profile_fields, profiling_settings
+from .tasks import store_slow_request
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Wrapper de execução do banco que mede cada consulta SQL da requisição."""
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.record_query(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Mede o tempo de cada requisição, as consultas SQL, o cache de produtos e as chamadas
+    à API externa. Os valores são expostos em /metrics e no cabeçalho Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_ENABLED', True)
+        self.slow_threshold = profiling_settings().get('SLOW_REQUEST_THRESHOLD')
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(QueryTimer()):
+                response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        duration = time.perf_counter() - start
+
+        view = request.resolver_match.view_name if request.resolver_match else 'unmatched'
+        metrics.REQUEST_DURATION.observe(duration, method=request.method, view=view, status=response.status_code)
+        metrics.DB_QUERIES.observe(request_metrics.db_count, view=view)
+        metrics.DB_DURATION.inc(request_metrics.db_time, view=view)
+
+        # Requisições lentas ficam registradas para análise no admin
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            self.enqueue_slow_request(request, response, duration, request_metrics)
+
+        if self.server_timing:
+            response['Server-Timing'] = self.format_server_timing(duration, request_metrics)
+        return response
+
+    @staticmethod
+    def enqueue_slow_request(request, response, duration, request_metrics):
+        """
+        O perfil é gravado pelo worker de jobs: na requisição, que já passou do limite, resta apenas
+        o INSERT do job. A gravação do perfil e a limpeza dos registros antigos ficam fora dela.
+        """
+        try:
+            store_slow_request.enqueue(
+                fields=profile_fields(RequestProfile.SLOW, request, response, duration, request_metrics)
+            )
+        except Exception:
+            # O registro da requisição lenta nunca deve afetar a resposta
+            logger.exception("Falha ao registrar a requisição lenta %s", request.path)
+
+    @staticmethod
+    def format_server_timing(duration, request_metrics):
+        entries = [
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.db_count} queries"',
+        ]
+        if request_metrics.catalog_count:
+            entries.append(
+                f'catalog;dur={request_metrics.catalog_time * 1000:.1f};desc="{request_metrics.catalog_count} calls"'
+            )
+        if request_metrics.cache_hits or request_metrics.cache_misses:
+            entries.append(f'cache;desc="{request_metrics.cache_hits} hits {request_metrics.cache_misses} misses"')
+        return ', '.join(entries)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('profile', 'Perfil solicitado'), ('slow', 'Requisição lenta')], db_index=True, max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2048)),
+                ('view', models.CharField(max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField(help_text='Tempo total da requisição em milissegundos')),
+                ('db_count', models.PositiveIntegerField(help_text='Quantidade de consultas SQL')),
+                ('db_time_ms', models.FloatField(help_text='Tempo gasto em consultas SQL em milissegundos')),
+                ('catalog_count', models.PositiveIntegerField(help_text='Quantidade de chamadas à API de produtos')),
+                ('catalog_time_ms', models.FloatField(help_text='Tempo gasto na API de produtos em milissegundos')),
+                ('queries', models.JSONField(blank=True, default=list, help_text='Consultas SQL agrupadas por comando')),
+                ('stats', models.TextField(blank=True, help_text='Saída do profiler (cProfile)')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
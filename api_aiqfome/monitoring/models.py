@@ -0,0 +1,32 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class RequestProfile(models.Model):
+    PROFILE = 'profile'
+    SLOW = 'slow'
+    KIND_CHOICES = [
+        (PROFILE, 'Perfil solicitado'),
+        (SLOW, 'Requisição lenta'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view = models.CharField(max_length=200)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField(help_text="Tempo total da requisição em milissegundos")
+    db_count = models.PositiveIntegerField(help_text="Quantidade de consultas SQL")
+    db_time_ms = models.FloatField(help_text="Tempo gasto em consultas SQL em milissegundos")
+    catalog_count = models.PositiveIntegerField(help_text="Quantidade de chamadas à API de produtos")
+    catalog_time_ms = models.FloatField(help_text="Tempo gasto na API de produtos em milissegundos")
+    queries = models.JSONField(default=list, blank=True, help_text="Consultas SQL agrupadas por comando")
+    stats = models.TextField(blank=True, help_text="Saída do profiler (cProfile)")
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
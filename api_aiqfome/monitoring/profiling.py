@@ -0,0 +1,164 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+from . import metrics
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+# O cProfile ativo é único no processo (no Python 3.12 utiliza o sys.monitoring), então
+# apenas uma requisição é perfilada por vez
+PROFILE_LOCK = threading.Lock()
+
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+
+def profiling_settings():
+    return getattr(settings, 'REQUEST_PROFILING', {})
+
+
+class QueryCollector:
+    """Agrupa as consultas SQL executadas pela requisição por comando, somando quantidade e tempo."""
+
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats = self.queries.setdefault(sql, {'sql': sql, 'count': 0, 'time_ms': 0.0})
+            stats['count'] += 1
+            stats['time_ms'] += (time.perf_counter() - start) * 1000
+
+    def top(self, limit=20):
+        return sorted(self.queries.values(), key=lambda query: query['time_ms'], reverse=True)[:limit]
+
+
+def profile_fields(kind, request, response, duration, request_metrics, queries=None, stats=''):
+    """Campos do RequestProfile da requisição, serializáveis em JSON para serem gravados por um job."""
+    user = getattr(request, 'user', None)
+    return {
+        'kind': kind,
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+        'method': request.method,
+        'path': request.get_full_path()[:2048],
+        'view': request.resolver_match.view_name if request.resolver_match else 'unmatched',
+        'status_code': response.status_code,
+        'duration_ms': duration * 1000,
+        'db_count': request_metrics.db_count,
+        'db_time_ms': request_metrics.db_time * 1000,
+        'catalog_count': request_metrics.catalog_count,
+        'catalog_time_ms': request_metrics.catalog_time * 1000,
+        'queries': queries or [],
+        'stats': stats,
+    }
+
+
+def save_profile(fields):
+    """Grava o perfil mantendo apenas os RING_SIZE registros mais recentes do mesmo tipo."""
+    profile = RequestProfile.objects.create(**fields)
+    ring_size = profiling_settings().get('RING_SIZE', 200)
+    oldest_kept = (
+        RequestProfile.objects.filter(kind=profile.kind).order_by('-id')
+        .values_list('id', flat=True)[ring_size - 1:ring_size]
+    )
+    RequestProfile.objects.filter(kind=profile.kind, id__lt=oldest_kept).delete()
+    return profile
+
+
+def store_profile(kind, request, response, duration, request_metrics, queries=None, stats=''):
+    """Salva o perfil da requisição durante a própria requisição (o id é retornado ao cliente)."""
+    try:
+        return save_profile(profile_fields(kind, request, response, duration, request_metrics, queries, stats))
+    except Exception:
+        # O registro do perfil nunca deve afetar a resposta
+        logger.exception("Falha ao salvar o perfil da requisição")
+        return None
+
+
+def is_enabled(value):
+    return value is not None and value.strip().lower() not in FALSE_VALUES
+
+
+def is_profiling_requested(request):
+    return is_enabled(request.META.get('HTTP_X_PROFILE')) or is_enabled(request.GET.get('profile'))
+
+
+def get_staff_user(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if result is None or not result[0].is_staff:
+        return None
+    return result[0]
+
+
+class ProfilingMiddleware:
+    """
+    Executa a requisição com o cProfile quando um usuário staff envia o cabeçalho 'X-Profile'
+    ou o parâmetro '?profile=1'. O perfil, com as consultas SQL e as chamadas à API de produtos,
+    é salvo em RequestProfile e o id é retornado no cabeçalho 'X-Profile-Id'.
+    Sem o cabeçalho ou parâmetro (ou com o valor '0'/'false') a requisição segue sem nenhum custo
+    adicional. Apenas uma requisição é perfilada por vez, as demais seguem sem perfil.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_profiling_requested(request) or get_staff_user(request) is None:
+            return self.get_response(request)
+
+        if not PROFILE_LOCK.acquire(blocking=False):
+            logger.info("Perfil de %s ignorado: outra requisição está sendo perfilada", request.path)
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            PROFILE_LOCK.release()
+
+    def profile(self, request):
+        request_metrics = metrics.current_request.get() or metrics.RequestMetrics()
+        collector = QueryCollector()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outra ferramenta de profiling (ou debugger) já está ativa no processo
+            logger.warning("Perfil de %s ignorado: profiler indisponível", request.path)
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(
+            profiling_settings().get('STATS_LIMIT', 50)
+        )
+        profile = store_profile(
+            RequestProfile.PROFILE, request, response, duration, request_metrics,
+            queries=collector.top(), stats=output.getvalue(),
+        )
+        if profile is not None:
+            response['X-Profile-Id'] = str(profile.id)
+        return response
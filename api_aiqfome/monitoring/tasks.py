@@ -0,0 +1,9 @@
+from jobs.registry import task
+
+from .profiling import save_profile
+
+
+@task('monitoring.store_slow_request', max_attempts=1)
+def store_slow_request(fields):
+    """Grava o perfil de uma requisição lenta enfileirado pelo MetricsMiddleware."""
+    return save_profile(fields).pk
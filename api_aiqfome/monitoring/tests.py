@@ -0,0 +1,214 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from customers import catalog
+from customers.models import FavoriteProduct
+from jobs.models import Job
+from jobs.worker import Worker
+from monitoring import metrics, profiling
+from monitoring.models import RequestProfile
+
+
+class MetricsIntegrationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@example.com', password='123456')
+
+    def setUp(self):
+        self.client = APIClient()
+        metrics.REGISTRY.clear()
+        cache.clear()
+
+    def authenticate(self, username, password):
+        """Autenticação e configuração do token."""
+        response = self.client.post('/auth/login', {'username': username, 'password': password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_server_timing_header(self):
+        """As respostas devem informar o tempo total e das consultas SQL no cabeçalho Server-Timing"""
+        self.authenticate('user', '123456')
+
+        response = self.client.get('/customers/favorite-products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('app;dur=', response['Server-Timing'])
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_request_metrics(self):
+        """Tempo de resposta e consultas SQL são registrados por endpoint"""
+        self.authenticate('user', '123456')
+        self.client.get('/customers/favorite-products/')
+
+        duration = metrics.REQUEST_DURATION.get(method='GET', view='favorite-products-list', status=200)
+        self.assertEqual(1, duration['count'])
+        queries = metrics.DB_QUERIES.get(view='favorite-products-list')
+        self.assertGreaterEqual(queries['sum'], 1)
+
+    def test_catalog_metrics(self):
+        """Chamadas à API externa e o uso do cache de produtos são registrados"""
+        FavoriteProduct.objects.create(user=self.user, product_id=1)
+        self.authenticate('user', '123456')
+
+        response_mock = mock.Mock(status_code=200)
+        response_mock.json.return_value = {'id': 1, 'title': 'Produto', 'rating': {'rate': 4, 'count': 1}}
+        with mock.patch.dict('os.environ', {'URL_EXTERNAL_API': 'http://catalog'}), \
+                mock.patch.object(catalog.requests, 'get', return_value=response_mock) as get:
+            response = self.client.get('/customers/favorite-products/')
+            self.client.get('/customers/favorite-products/')
+
+        get.assert_called_once_with('http://catalog/1', timeout=catalog.REQUEST_TIMEOUT)
+        self.assertIn('catalog;dur=', response['Server-Timing'])
+        self.assertEqual(1, metrics.CACHE_REQUESTS.get(key='product', result='miss'))
+        self.assertEqual(1, metrics.CACHE_REQUESTS.get(key='product', result='hit'))
+        self.assertEqual(1, metrics.CATALOG_DURATION.get(status=200)['count'])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        """O endpoint /metrics exporta as métricas no formato do Prometheus"""
+        self.client.get('/customers/favorite-products/')
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', content)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",view="favorite-products-list",status="401"} 1',
+            content
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_with_token(self):
+        """Com METRICS_TOKEN definido o endpoint exige o token"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_endpoint_without_token(self):
+        """Sem METRICS_TOKEN o endpoint só é acessível com DEBUG"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(DEBUG=True):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(REQUEST_PROFILING={'SLOW_REQUEST_THRESHOLD': None, 'RING_SIZE': 2})
+class ProfilingIntegrationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', is_staff=True)
+        cls.user = User.objects.create_user(username='user', email='user@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_profile_with_staff_user(self):
+        """Usuário staff pode solicitar o perfil da requisição pelo cabeçalho X-Profile"""
+        self.authenticate(self.admin)
+
+        response = self.client.get('/customers/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profile = RequestProfile.objects.get(id=response['X-Profile-Id'])
+        self.assertEqual(RequestProfile.PROFILE, profile.kind)
+        self.assertEqual(self.admin, profile.user)
+        self.assertEqual('user-list', profile.view)
+        self.assertIn('cumulative', profile.stats)
+        self.assertGreaterEqual(profile.db_count, 1)
+        self.assertTrue(any('auth_user' in query['sql'] for query in profile.queries))
+
+    def test_profile_with_query_parameter(self):
+        """O perfil também pode ser solicitado pelo parâmetro profile"""
+        self.authenticate(self.admin)
+
+        response = self.client.get('/customers/favorite-products/', {'profile': '1'})
+        self.assertIn('X-Profile-Id', response)
+
+    def test_profile_disabled_values(self):
+        """Os valores '0' e 'false' não ativam o perfil"""
+        self.authenticate(self.admin)
+
+        for value in ('0', 'false', 'False'):
+            response = self.client.get('/customers/', HTTP_X_PROFILE=value)
+            self.assertNotIn('X-Profile-Id', response)
+        response = self.client.get('/customers/', {'profile': '0'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_profile_already_running(self):
+        """Enquanto outra requisição é perfilada (ou outro profiler está ativo) a requisição segue sem perfil"""
+        self.authenticate(self.admin)
+
+        with profiling.PROFILE_LOCK:
+            response = self.client.get('/customers/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+
+        with mock.patch('cProfile.Profile.enable', side_effect=ValueError('Another profiling tool is already active')):
+            response = self.client.get('/customers/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertFalse(profiling.PROFILE_LOCK.locked())
+
+    def test_profile_with_user_not_staff(self):
+        """Usuário comum não pode solicitar o perfil da requisição"""
+        self.authenticate(self.user)
+
+        response = self.client.get('/customers/favorite-products/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_profile_without_authenticated(self):
+        """Usuário não autenticado ou com token inválido não pode solicitar o perfil"""
+        response = self.client.get('/customers/favorite-products/', HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        response = self.client.get('/customers/favorite-products/', HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(REQUEST_PROFILING={'SLOW_REQUEST_THRESHOLD': 0, 'RING_SIZE': 2})
+    def test_slow_requests_ring_buffer(self):
+        """Requisições lentas são registradas mantendo apenas as mais recentes"""
+        self.authenticate(self.user)
+        for _ in range(3):
+            self.client.get('/customers/favorite-products/')
+
+        # O perfil é gravado pelo worker de jobs, fora da requisição
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertEqual(3, Job.objects.filter(task='monitoring.store_slow_request').count())
+        worker = Worker(name='test')
+        while worker.run_once():
+            pass
+
+        profiles = RequestProfile.objects.filter(kind=RequestProfile.SLOW)
+        self.assertEqual(2, profiles.count())
+        self.assertEqual({'favorite-products-list'}, {profile.view for profile in profiles})
+        self.assertEqual({self.user}, {profile.user for profile in profiles})
+
+    @override_settings(REQUEST_PROFILING={'SLOW_REQUEST_THRESHOLD': 0, 'RING_SIZE': 2})
+    def test_slow_request_enqueue_failure(self):
+        """Uma falha ao registrar a requisição lenta não afeta a resposta"""
+        self.authenticate(self.user)
+        with mock.patch('monitoring.tasks.store_slow_request.enqueue', side_effect=Exception('db down')), \
+                self.assertLogs('monitoring.middleware', level='ERROR'):
+            response = self.client.get('/customers/favorite-products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Job.objects.exists())